@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+@file: cache.py
+@desc: Small on-disk key/value cache with expiry, shared across daily runs
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from typing import Any, Optional
+import orjson
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from JSON-serializable parts
+    
+    Args:
+        *parts: Values identifying the cached item, dicts are key-order independent
+    
+    Returns:
+        Hex digest usable as a file name
+    """
+    payload = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """File-per-entry cache of JSON-serializable values with a time-to-live"""
+
+    def __init__(self, directory: str, ttl: int):
+        """
+        Initialize the cache
+        
+        Args:
+            directory: Directory holding cache entries, an empty string disables caching
+            ttl: Default entry lifetime in seconds
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self._prune_expired()
+
+    def _prune_expired(self) -> None:
+        """Remove expired entries, keys that are never read again would otherwise pile up"""
+        if not self.directory:
+            return
+        
+        now = time.time()
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                # 中断的写入留下的临时文件
+                try:
+                    if os.path.getmtime(path) < now - 3600:
+                        os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    expires_at = orjson.loads(f.read()).get("expires_at", 0)
+            except (OSError, orjson.JSONDecodeError, AttributeError):
+                expires_at = 0
+            if expires_at < now:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _path(self, key: str) -> str:
+        """Get the file path of a cache entry"""
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value
+        
+        Args:
+            key: Cache key, see make_key
+        
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        if not self.directory:
+            return None
+        
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        
+        if entry.get("expires_at", 0) < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """
+        Store a value, failures to write are ignored
+        
+        Args:
+            key: Cache key, see make_key
+            value: JSON-serializable value
+            ttl: Entry lifetime in seconds, defaults to the cache TTL
+        """
+        if not self.directory:
+            return
+        
+        entry = {"expires_at": time.time() + (self.ttl if ttl is None else ttl), "value": value}
+        tmp_path = None
+        try:
+            data = orjson.dumps(entry)
+            os.makedirs(self.directory, exist_ok=True)
+            # 先写唯一命名的临时文件再原子替换，避免并发读到半截内容，多线程写同一个键也互不干扰
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError) as e:
+            print(f"[WARN] Failed to write cache entry {key}: {e}")
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
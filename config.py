@@ -5,8 +5,12 @@
 @desc: Configuration settings for GitHub Trending Reporter
 """
 
+import functools
 import os
+import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
@@ -17,9 +21,47 @@ GITHUB_TRENDING_URL = "https://github.com/trending"
 LLM_API_KEY = os.getenv("LLM_API_KEY", "")
 LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://open.bigmodel.cn/api/paas/v4/")
 LLM_MODEL = os.getenv("LLM_MODEL", "glm-4.5-flash")
+# Cheaper model for the short trend summary and recommendations, defaults to LLM_MODEL
+LLM_MODEL_LIGHT = os.getenv("LLM_MODEL_LIGHT") or LLM_MODEL
+
+# Batch API endpoint for --batch mode, derived from the base URL version (e.g. /v4/chat/completions)
+LLM_BATCH_ENDPOINT = os.getenv("LLM_BATCH_ENDPOINT") or f"/{LLM_BASE_URL.rstrip('/').rsplit('/', 1)[-1]}/chat/completions"
+# Give up waiting for a batch after this many seconds and analyze directly
+LLM_BATCH_TIMEOUT = 4 * 3600
+
+# Maximum number of concurrent LLM requests
+LLM_MAX_CONCURRENCY = 8
+
+# Number of top projects analyzed together with the trend summary in merged mode
+LLM_MERGED_TOP_N = 5
+
+# Use the hand-compressed prompts in prompts/*.compressed.md (set to false to roll back)
+LLM_COMPRESSED_PROMPTS = os.getenv("LLM_COMPRESSED_PROMPTS", "true").lower() not in ("0", "false", "no")
+
+# Approximate token budget for the trend prompt, least-starred repos are left out beyond it
+LLM_MAX_PROMPT_TOKENS = 6000
+
+# Approximate token budget for the README excerpt in each detailed-analysis prompt
+LLM_README_TOKEN_BUDGET = 256
+
+# On-disk cache of LLM responses, reused across daily runs (empty to disable)
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_TTL = 7 * 86400
 
 # GitHub API Token (for avoiding rate limits when scraping)
 GITHUB_API_TOKEN = os.getenv("GITHUB_API_TOKEN", "")
+# Extra tokens (comma-separated) to rotate through, each adds its own rate limit
+GITHUB_API_TOKENS = [
+    token.strip() for token in (os.getenv("GITHUB_API_TOKENS") or GITHUB_API_TOKEN).split(",") if token.strip()
+]
+
+# On-disk cache of GitHub REST responses with their ETags, revalidated with If-None-Match (empty to disable)
+GITHUB_CACHE_DIR = os.getenv("GITHUB_CACHE_DIR", ".github_cache")
+# How long cached responses are kept for revalidation; longer than a day so the daily run can reuse them
+GITHUB_CACHE_TTL = 2 * 86400
+GITHUB_CACHE_TTL_LONG = 7 * 86400  # README and languages change rarely
+# A cached trending page younger than this is used without contacting GitHub
+TRENDING_CACHE_FRESH = 600
 
 # GitHub Configuration for pushing data
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "")
@@ -28,6 +70,15 @@ DATA_REPO_NAME = os.getenv("DATA_REPO_NAME", "github-trending-reporter-data")
 
 # Request Configuration
 REQUEST_TIMEOUT = 30
+# Maximum concurrent GitHub REST requests (GitHub advises against more for secondary rate limits)
+GITHUB_API_CONCURRENCY = 10
+# Below this many remaining requests, GitHub API calls are spread evenly until the rate limit resets
+GITHUB_RATE_LIMIT_RESERVE = 100
+# Only the repositories with the most stars today are enriched via the GitHub API, the rest keep scraped fields
+# (the trending page lists 25, so the default enriches all of them)
+ENRICH_TOP_K = int(os.getenv("ENRICH_TOP_K", "25"))
+# Maximum repositories per GitHub GraphQL query
+GITHUB_GRAPHQL_BATCH_SIZE = 25
 REQUEST_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
@@ -35,15 +86,64 @@ REQUEST_HEADERS = {
 }
 
 # GitHub API Headers (with token for rate limiting)
-def get_github_api_headers():
-    """Get headers for GitHub API requests"""
+@functools.cache
+def get_github_api_headers(token: str = None):
+    """
+    Get headers for GitHub API requests
+    
+    The dict is built once per token and shared, so callers must copy it before modifying.
+    Call get_github_api_headers.cache_clear() after rotating GITHUB_API_TOKEN.
+    
+    Args:
+        token: API token to authenticate with, defaults to GITHUB_API_TOKEN
+    """
+    if token is None:
+        token = GITHUB_API_TOKEN
     headers = {
         "Accept": "application/vnd.github.v3+json",
         "User-Agent": "GitHub-Trending-Reporter",
     }
-    if GITHUB_API_TOKEN:
-        headers["Authorization"] = f"token {GITHUB_API_TOKEN}"
+    if token:
+        headers["Authorization"] = f"token {token}"
     return headers
 
+# HTTP connection pooling and retry policy
+def get_http_retry(allowed_methods: frozenset = Retry.DEFAULT_ALLOWED_METHODS, raise_on_status: bool = True) -> Retry:
+    """
+    Get the retry policy for transient HTTP failures, honoring Retry-After
+    
+    Args:
+        allowed_methods: Methods that are retried, POST is left out by default as it may not be idempotent
+        raise_on_status: Whether to raise once retries are exhausted instead of returning the last response
+    """
+    return Retry(
+        total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=allowed_methods, respect_retry_after_header=True, raise_on_status=raise_on_status
+    )
+
+def create_http_session(headers: dict = None, max_connections: int = GITHUB_API_CONCURRENCY,
+                        retry_post: bool = False) -> requests.Session:
+    """
+    Create a requests session with keep-alive connection pooling and retries
+    
+    Args:
+        headers: Default headers sent with every request
+        max_connections: Connections kept open per host; further concurrent requests
+            wait for a free connection instead of opening short-lived extra sockets
+        retry_post: Also retry POST requests, only for read-only APIs such as GraphQL queries
+    
+    Failed responses are returned after the last retry so callers can inspect the status code.
+    """
+    allowed_methods = Retry.DEFAULT_ALLOWED_METHODS | {"POST"} if retry_post else Retry.DEFAULT_ALLOWED_METHODS
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4, pool_maxsize=max_connections, pool_block=True,
+        max_retries=get_http_retry(allowed_methods, raise_on_status=False)
+    )
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
 # Output Configuration
 OUTPUT_FORMAT = "markdown"  # markdown or json
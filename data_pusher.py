@@ -5,24 +5,98 @@
 @desc: Push trending data and reports to a separate GitHub repository
 """
 
-import json
 import base64
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
-from github import Github, GithubException
-from tenacity import retry, stop_after_attempt, wait_exponential
+from string import Template
+from typing import Dict, List, Optional, Union
+import orjson
+import requests
+from github import Github, GithubException, InputGitTreeElement
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 import config
 
 
+# Retry only the GitHub request boundary on network failures; 5xx responses
+# are already retried by the PyGithub transport (see config.get_http_retry)
+retry_github_call = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(requests.exceptions.RequestException),
+    reraise=True
+)
+
+# README.md of the data repository
+README_TEMPLATE = Template("""# GitHub Trending Reporter Data
+
+This repository stores daily GitHub trending data and AI-generated analysis reports.
+
+## Latest Report
+
+**[$date_str](reports/$year/$month/$date_str.md)**
+
+## Repository Structure
+
+```
+├── reports/          # Markdown reports with AI analysis
+│   └── YYYY/
+│       └── MM/
+│           └── YYYY-MM-DD.md
+├── data/             # Raw JSON data
+│   └── YYYY/
+│       └── MM/
+│           └── YYYY-MM-DD.json
+└── README.md
+```
+
+## Links
+
+- [GitHub Trending](https://github.com/trending)
+- [Source Code](https://github.com/$owner/github-trending-reporter)
+
+## Data Format
+
+Each JSON file contains:
+- `date`: Report date
+- `generated_at`: Generation timestamp
+- `total_repos`: Number of repositories
+- `repositories`: Array of repository objects
+
+---
+
+*This data is automatically updated daily by GitHub Actions.*
+""")
+
+
+def git_blob_sha(content: Union[str, bytes]) -> str:
+    """
+    Compute the SHA git assigns to a blob with the given content
+    
+    Args:
+        content: File content, str is encoded as UTF-8
+    
+    Returns:
+        Hex SHA-1 of the blob object
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    header = f"blob {len(content)}\0".encode("ascii")
+    return hashlib.sha1(header + content).hexdigest()
+
+
 class DataPusher:
     """Push data to a GitHub repository for persistence"""
 
     def __init__(self):
         """Initialize the GitHub client"""
-        self.github = Github(config.GITHUB_TOKEN)
+        self.github = Github(config.GITHUB_TOKEN, retry=config.get_http_retry(), per_page=100)
         self.repo_owner = config.DATA_REPO_OWNER
         self.repo_name = config.DATA_REPO_NAME
         self._repo = None
+        # file_path -> blob SHA of the last version we wrote or saw
+        self._sha_cache: Dict[str, str] = {}
 
     @property
     def repo(self):
@@ -53,7 +127,6 @@ class DataPusher:
         else:
             raise ValueError(f"Unknown file type: {file_type}")
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def push_report(self, content: str, date_str: str) -> bool:
         """
         Push markdown report to the repository
@@ -70,7 +143,6 @@ class DataPusher:
         
         return self._create_or_update_file(file_path, content, commit_message)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def push_raw_data(self, repos: List[Dict], date_str: str) -> bool:
         """
         Push raw JSON data to the repository
@@ -83,7 +155,13 @@ class DataPusher:
             True if successful
         """
         file_path = self._get_file_path(date_str, "data")
+        content = self._build_raw_data(repos, date_str)
+        commit_message = f"Add raw data for {date_str}"
         
+        return self._create_or_update_file(file_path, content, commit_message)
+
+    def _build_raw_data(self, repos: List[Dict], date_str: str) -> bytes:
+        """Serialize repositories into the raw JSON data file content (UTF-8)"""
         data = {
             "date": date_str,
             "generated_at": datetime.utcnow().isoformat(),
@@ -91,46 +169,98 @@ class DataPusher:
             "repositories": repos
         }
         
-        content = json.dumps(data, indent=2, ensure_ascii=False)
-        commit_message = f"Add raw data for {date_str}"
-        
-        return self._create_or_update_file(file_path, content, commit_message)
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
 
-    def _create_or_update_file(self, file_path: str, content: str, commit_message: str) -> bool:
+    @retry_github_call
+    def _create_or_update_file(self, file_path: str, content: Union[str, bytes], commit_message: str) -> bool:
         """
         Create or update a file in the repository
         
         Args:
             file_path: Path to the file in the repository
-            content: File content
+            content: File content, bytes are uploaded as-is
             commit_message: Git commit message
         
         Returns:
             True if successful
         """
         try:
-            # Try to get existing file
-            try:
-                existing_file = self.repo.get_contents(file_path)
-                # Update existing file
-                self.repo.update_file(
-                    file_path,
-                    commit_message,
-                    content,
-                    existing_file.sha
-                )
-                print(f"Updated file: {file_path}")
-            except GithubException as e:
-                if e.status == 404:
-                    # File doesn't exist, create it
-                    self.repo.create_file(
-                        file_path,
-                        commit_message,
-                        content
-                    )
+            result = None
+            sha = self._sha_cache.get(file_path)
+            
+            if sha is None:
+                # 先尝试直接创建，省去探测文件是否存在的 GET 请求
+                try:
+                    result = self.repo.create_file(file_path, commit_message, content)
                     print(f"Created file: {file_path}")
-                else:
-                    raise
+                except GithubException as e:
+                    if e.status not in (409, 422):
+                        raise
+                    # File already exists, fetch its SHA for the update
+                    sha = self.repo.get_contents(file_path).sha
+            
+            if result is None:
+                try:
+                    result = self.repo.update_file(file_path, commit_message, content, sha)
+                except GithubException as e:
+                    if e.status != 409 or file_path not in self._sha_cache:
+                        raise
+                    # Cached SHA is stale, retry once with the current one
+                    sha = self.repo.get_contents(file_path).sha
+                    result = self.repo.update_file(file_path, commit_message, content, sha)
+                print(f"Updated file: {file_path}")
+            
+            self._sha_cache[file_path] = result["content"].sha
+            return True
+        except GithubException as e:
+            print(f"Error pushing to repository: {e}")
+            return False
+
+    def _create_blob(self, content: Union[str, bytes]) -> str:
+        """
+        Upload file content as a base64 git blob
+        
+        Args:
+            content: File content, str is encoded as UTF-8
+        
+        Returns:
+            SHA of the created blob
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        encoded = base64.b64encode(content).decode("ascii")
+        return self.repo.create_git_blob(encoded, "base64").sha
+
+    @retry_github_call
+    def push_files(self, files: Dict[str, Union[str, bytes]], commit_message: str) -> bool:
+        """
+        Push several files in a single commit using the Git Data API
+        
+        Args:
+            files: Mapping of file path in the repository to file content
+            commit_message: Git commit message
+        
+        Returns:
+            True if successful
+        """
+        try:
+            branch_ref = self.repo.get_git_ref(f"heads/{self.repo.default_branch}")
+            parent = self.repo.get_git_commit(branch_ref.object.sha)
+            
+            # 各文件的 blob 相互独立，并发上传
+            with ThreadPoolExecutor(max_workers=max(1, len(files))) as executor:
+                blob_shas = dict(zip(files, executor.map(self._create_blob, files.values())))
+            elements = [
+                InputGitTreeElement(file_path, "100644", "blob", sha=blob_sha)
+                for file_path, blob_sha in blob_shas.items()
+            ]
+            tree = self.repo.create_git_tree(elements, base_tree=parent.tree)
+            commit = self.repo.create_git_commit(commit_message, tree, [parent])
+            branch_ref.edit(commit.sha)
+            
+            self._sha_cache.update(blob_shas)
+            for file_path in files:
+                print(f"Pushed file: {file_path}")
             return True
         except GithubException as e:
             print(f"Error pushing to repository: {e}")
@@ -138,7 +268,7 @@ class DataPusher:
 
     def push_all(self, repos: List[Dict], report: str, date_str: str) -> Dict[str, bool]:
         """
-        Push both raw data and report
+        Push raw data, report and README in a single commit
         
         Args:
             repos: List of repository dictionaries
@@ -148,9 +278,17 @@ class DataPusher:
         Returns:
             Dictionary with success status for each push
         """
+        files = {
+            self._get_file_path(date_str, "data"): self._build_raw_data(repos, date_str),
+            self._get_file_path(date_str, "report"): report,
+            "README.md": self._build_readme(date_str),
+        }
+        success = self.push_files(files, f"Add trending report for {date_str}")
+        
         results = {
-            "raw_data": self.push_raw_data(repos, date_str),
-            "report": self.push_report(report, date_str)
+            "raw_data": success,
+            "report": success,
+            "readme": success
         }
         return results
 
@@ -164,47 +302,48 @@ class DataPusher:
         Returns:
             True if successful
         """
-        readme_content = f"""# GitHub Trending Reporter Data
-
-This repository stores daily GitHub trending data and AI-generated analysis reports.
-
-## Latest Report
-
-**[{date_str}](reports/{date_str[:4]}/{date_str[5:7]}/{date_str}.md)**
-
-## Repository Structure
-
-```
-├── reports/          # Markdown reports with AI analysis
-│   └── YYYY/
-│       └── MM/
-│           └── YYYY-MM-DD.md
-├── data/             # Raw JSON data
-│   └── YYYY/
-│       └── MM/
-│           └── YYYY-MM-DD.json
-└── README.md
-```
-
-## Links
+        readme_content = self._build_readme(date_str)
+        
+        # 内容未变化时跳过提交，避免产生空的 "Update README" 提交
+        try:
+            existing_sha = self._sha_cache.get("README.md")
+            if existing_sha is None:
+                existing_sha = self.repo.get_contents("README.md").sha
+                self._sha_cache["README.md"] = existing_sha
+        except GithubException as e:
+            if e.status != 404:
+                print(f"Error reading README: {e}")
+                return False
+            existing_sha = None
+        
+        if existing_sha == git_blob_sha(readme_content):
+            print("README unchanged, skipping update")
+            return True
+        
+        return self._create_or_update_file("README.md", readme_content, f"Update README for {date_str}")
 
-- [GitHub Trending](https://github.com/trending)
-- [Source Code](https://github.com/{self.repo_owner}/github-trending-reporter)
+    def _build_readme(self, date_str: str) -> str:
+        """Build the README.md content pointing at the latest report"""
+        return README_TEMPLATE.substitute(
+            date_str=date_str,
+            year=date_str[:4],
+            month=date_str[5:7],
+            owner=self.repo_owner
+        )
 
-## Data Format
 
-Each JSON file contains:
-- `date`: Report date
-- `generated_at`: Generation timestamp
-- `total_repos`: Number of repositories
-- `repositories`: Array of repository objects
-
----
-
-*This data is automatically updated daily by GitHub Actions.*
-"""
-        
-        return self._create_or_update_file("README.md", readme_content, f"Update README for {date_str}")
+@functools.lru_cache(maxsize=1)
+def get_pusher() -> DataPusher:
+    """
+    Get the shared DataPusher instance
+    
+    The GitHub client session and the resolved data repository are reused
+    across pushes instead of being looked up again for every call.
+    
+    Returns:
+        Process-wide DataPusher instance
+    """
+    return DataPusher()
 
 
 def push_data(repos: List[Dict], report: str, date_str: str) -> Dict[str, bool]:
@@ -219,10 +358,8 @@ def push_data(repos: List[Dict], report: str, date_str: str) -> Dict[str, bool]:
     Returns:
         Dictionary with success status
     """
-    pusher = DataPusher()
-    results = pusher.push_all(repos, report, date_str)
-    pusher.update_readme(date_str)
-    return results
+    pusher = get_pusher()
+    return pusher.push_all(repos, report, date_str)
 
 
 if __name__ == "__main__":
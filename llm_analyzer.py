@@ -5,11 +5,344 @@
 @desc: LLM-based analysis for GitHub trending repositories
 """
 
+import asyncio
+import heapq
+import io
 import json
-from typing import List, Dict, Optional
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+import math
+import os
+import re
+import unicodedata
+from collections import ChainMap, Counter
+from operator import itemgetter
+from string import Template
+from typing import Callable, List, Dict, Optional, TextIO, Tuple
+import orjson
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 import config
+from cache import DiskCache, make_key
+
+
+# 只在 LLM 接口层重试网络错误、限流和服务端错误，不重复构建 prompt
+retry_llm_call = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type((APIConnectionError, RateLimitError, InternalServerError)),
+    reraise=True
+)
+
+# 报告的 Docusaurus frontmatter
+REPORT_FRONTMATTER = Template("""---
+sidebar_position: 1
+title: $date_str 日报
+description: GitHub Trending 每日热门项目报告 - $date_str
+---
+""")
+
+# 提供给 LLM 的单个项目摘要
+REPO_SUMMARY_TEMPLATE = (
+    "{i}. **{full_name}** ({language})\n"
+    "   - Stars: {stars:,} (+{stars_today:,} today)\n"
+    "   - Forks: {forks:,}\n"
+    "   - Description: {description}\n"
+    "   - Topics: {topics}\n"
+    "   - URL: {url}"
+)
+
+REPO_SUMMARY_DEFAULTS = {
+    "full_name": "Unknown",
+    "language": "Unknown",
+    "stars": 0,
+    "stars_today": 0,
+    "forks": 0,
+    "description": "No description",
+    "url": "",
+}
+
+# LLM 不可用时的项目解读
+FALLBACK_ANALYSIS_TEMPLATE = """### {rank}. {full_name}
+
+> **项目简介**：{description}
+
+#### 🎯 基本信息
+
+| 维度 | 说明 |
+|------|------|
+| **语言** | {language} |
+| **今日Star** | +{stars_today:,} |
+| **总Star** | {stars:,} |
+
+#### 🔗 链接
+
+- GitHub: [{full_name}]({url})
+
+---"""
+
+# LLM 不可用时的今日推荐表格
+FALLBACK_RECOMMEND_HEADER = "| 主题 | 推荐项目 | 亮点 |\n|------|----------|------|"
+FALLBACK_RECOMMEND_ROW = "| {scenario} | [{name}]({url}) | {desc} |"
+FALLBACK_RECOMMEND_SCENARIOS = ("今日最热", "值得关注", "快速上手", "长期潜力")
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+
+def load_prompt(name: str) -> str:
+    """
+    Load a prompt template from the prompts directory
+    
+    The hand-compressed variant (<name>.compressed.md) is preferred when it
+    exists; set LLM_COMPRESSED_PROMPTS=false to fall back to the full prompts
+    if report quality regresses.
+    
+    Args:
+        name: Prompt file name without extension
+    
+    Returns:
+        Prompt text without the trailing newline
+    """
+    path = os.path.join(PROMPTS_DIR, f"{name}.md")
+    compressed_path = os.path.join(PROMPTS_DIR, f"{name}.compressed.md")
+    if config.LLM_COMPRESSED_PROMPTS and os.path.exists(compressed_path):
+        path = compressed_path
+    with open(path, encoding="utf-8") as f:
+        return f.read().rstrip("\n")
+
+
+# 每日趋势总结
+TREND_SYSTEM_PROMPT = load_prompt("trend_system")
+TREND_OUTPUT_FORMAT = load_prompt("trend_output_format")
+TREND_PROMPT = Template(load_prompt("trend")).substitute(output_format=TREND_OUTPUT_FORMAT)
+
+# 单个项目深度解读：输出格式放在各项目共用的 system 消息中，保证请求前缀完全一致以命中
+# 服务端的 prompt 缓存；序号、项目名等随项目变化的内容只出现在末尾的 user 消息里
+DETAIL_OUTPUT_FORMAT = load_prompt("detail_output_format")
+DETAIL_SYSTEM_PROMPT = Template(load_prompt("detail_system")).substitute(
+    output_format=DETAIL_OUTPUT_FORMAT.format(rank="序号", full_name="项目全名")
+)
+DETAIL_PROMPT = load_prompt("detail")
+
+# 趋势总结与头部项目深度解读合并为一次请求
+MERGED_SYSTEM_PROMPT = load_prompt("merged_system")
+MERGED_PROMPT = Template(load_prompt("merged")).substitute(
+    trend_output_format=TREND_OUTPUT_FORMAT.replace("{", "{{").replace("}", "}}"),
+    detail_output_format=DETAIL_OUTPUT_FORMAT.format(
+        rank="序号", full_name="项目全名"
+    ).replace("{", "{{").replace("}", "}}")
+)
+
+# 今日推荐表格
+RECOMMEND_SYSTEM_PROMPT = load_prompt("recommend_system")
+RECOMMEND_PROMPT = load_prompt("recommend")
+
+
+def estimate_tokens(text: str) -> float:
+    """
+    Roughly estimate how many LLM tokens a text costs
+    
+    ASCII averages about 4 characters per token while CJK and other
+    non-ASCII characters cost about one token each.
+    """
+    ascii_count = sum(1 for ch in text if ch < "\x80")
+    return ascii_count / 4 + (len(text) - ascii_count)
+
+
+def truncate_to_tokens(text: str, max_tokens: float) -> str:
+    """
+    Truncate text to an approximate token budget
+    
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget, estimated like estimate_tokens
+    
+    Returns:
+        The longest prefix of text that fits the budget
+    """
+    used = 0.0
+    for i, ch in enumerate(text):
+        used += 0.25 if ch < "\x80" else 1
+        if used > max_tokens:
+            return text[:i]
+    return text
+
+
+# 缓存的项目解读可能来自其他排名，命中时替换标题中的序号
+DETAIL_RANK_PATTERN = re.compile(r"^### \d+\.", re.M)
+
+# README 中信息量很低的噪声：徽章图片、HTML 标签与注释
+README_NOISE_PATTERN = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)|!\[[^\]]*\]\([^)]*\)|<!--.*?-->|<[^>]+>", re.S)
+README_SENTENCE_PATTERN = re.compile(r"(?<=[.!?。！？])\s+")
+README_WORD_PATTERN = re.compile(r"[a-z0-9]+|[^\x00-\x7f]")
+
+
+def compress_readme(text: str, max_tokens: float) -> str:
+    """
+    Shrink a README excerpt to an approximate token budget, keeping its most informative sentences
+    
+    Badges, images, HTML, code fences and repeated lines are dropped first. If
+    that is still over budget, sentences are scored by the mean inverse
+    document frequency of their words within the README, so boilerplate that
+    repeats common words ranks low, and the best ones are kept in their
+    original order.
+    
+    Args:
+        text: Raw README text
+        max_tokens: Token budget, estimated like estimate_tokens
+    
+    Returns:
+        Compressed README text
+    """
+    lines = []
+    seen = set()
+    for line in README_NOISE_PATTERN.sub("", text).splitlines():
+        line = line.strip()
+        # 跳过空行、代码块围栏和重复行
+        if line and not line.startswith("```") and line not in seen:
+            seen.add(line)
+            lines.append(line)
+    
+    cleaned = "\n".join(lines)
+    if estimate_tokens(cleaned) <= max_tokens:
+        return cleaned
+    
+    sentences = [part for line in lines for part in README_SENTENCE_PATTERN.split(line)]
+    words = [set(README_WORD_PATTERN.findall(sentence.lower())) for sentence in sentences]
+    doc_freq = Counter(word for sentence_words in words for word in sentence_words)
+    total = len(sentences)
+    
+    def score(i: int) -> float:
+        if not words[i]:
+            return 0.0
+        return sum(math.log(total / doc_freq[word]) for word in words[i]) / len(words[i])
+    
+    # 开头的标题和第一句正文通常是项目名与一句话介绍，始终保留
+    intro = next((i for i, sentence in enumerate(sentences) if not sentence.startswith("#")), 0)
+    kept = {0, intro}
+    used = sum(estimate_tokens(sentences[i]) + 0.25 for i in kept)
+    for i in sorted(set(range(total)) - kept, key=score, reverse=True):
+        cost = estimate_tokens(sentences[i]) + 0.25
+        if used + cost <= max_tokens:
+            kept.add(i)
+            used += cost
+    
+    return truncate_to_tokens("\n".join(sentences[i] for i in sorted(kept)), max_tokens)
+
+
+# 表格单元格中会破坏 markdown 表格的字符
+DESC_ESCAPE_TABLE = str.maketrans({"|": "\\|", "\n": " ", "\r": None})
+
+
+def truncate_desc(desc: Optional[str], max_width: int = 30) -> str:
+    """
+    Prepare a description for a markdown table cell
+    
+    Wide (CJK) characters count as two columns, so Chinese descriptions take
+    about the same room in the table as English ones. Pipes are escaped and
+    line breaks flattened.
+    
+    Args:
+        desc: Repository description, may be empty
+        max_width: Maximum display width including the trailing "..."
+    
+    Returns:
+        Truncated, table-safe description
+    """
+    desc = desc or "No description"
+    used = 0
+    cut = None
+    for i, ch in enumerate(desc):
+        used += 2 if unicodedata.east_asian_width(ch) in "WF" else 1
+        if cut is None and used > max_width - 3:
+            cut = i
+        if used > max_width:
+            desc = desc[:cut] + "..."
+            break
+    return desc.translate(DESC_ESCAPE_TABLE)
+
+
+# Keyword buckets for the trend chart, in priority order: a repository goes
+# into the first bucket whose keywords appear in its description, name or topics
+CATEGORY_KEYWORDS = [
+    ("AI/ML 工具", ['ai', 'ml', 'machine learning', 'llm', 'gpt', 'claude', 'agent', 'neural', 'deep learning']),
+    ("开发框架", ['framework', 'fullstack', 'react', 'vue', 'angular', 'dioxus', 'flutter']),
+    ("多媒体应用", ['video', 'audio', 'media', 'cam', 'face', 'image', 'deepfake']),
+    ("智能家居", ['home', 'assistant', 'smart', 'iot', 'automation']),
+    ("媒体资源", ['iptv', 'streaming', 'tv', 'channel']),
+    ("项目管理", ['project', 'management', 'kanban', 'task']),
+    ("开发工具", ['cli', 'tool', 'utility', 'terminal', 'shell']),
+    ("数据分析", ['crawler', 'scraper', 'data', 'analysis', 'analytics']),
+    ("安全工具", ['security', 'crypto', 'encryption', 'auth']),
+]
+KEYWORD_RANK = {}
+for _rank, (_, _keywords) in enumerate(CATEGORY_KEYWORDS):
+    for _kw in _keywords:
+        KEYWORD_RANK.setdefault(_kw, _rank)
+
+
+def keyword_trie_pattern(keywords: List[str], depth: int = 2) -> str:
+    """
+    Build a regex alternation factored by shared leading characters
+    
+    ['agent', 'audio', 'auth'] becomes 'a(?:gent|u(?:dio|th))', so the engine
+    tests each leading character once and only then tries the few keywords
+    sharing it. Keyword order is kept inside every group.
+    
+    Args:
+        keywords: Keywords to match, in priority order
+        depth: Number of leading characters to factor out
+    
+    Returns:
+        Regex source matching any of the keywords
+    """
+    groups: Dict[str, List[str]] = {}
+    for kw in keywords:
+        groups.setdefault(kw[:1], []).append(kw[1:])
+    
+    parts = []
+    for head, tails in groups.items():
+        if len(tails) == 1:
+            parts.append(re.escape(head + tails[0]))
+        elif depth > 1 and all(tails):
+            parts.append(f"{re.escape(head)}(?:{keyword_trie_pattern(tails, depth - 1)})")
+        else:
+            parts.append(f"{re.escape(head)}(?:{'|'.join(map(re.escape, tails))})")
+    return "|".join(parts)
+
+
+# 所有关键词按前两个字符分组编译成一个正则，前瞻匹配以便像子串查找一样允许重叠命中
+CATEGORY_PATTERN = re.compile(f"(?=({keyword_trie_pattern(list(KEYWORD_RANK))}))")
+
+
+def create_limited_tasks(semaphore: asyncio.Semaphore, *aws) -> List[asyncio.Task]:
+    """
+    Schedule coroutines as tasks that each hold the semaphore while running
+    
+    Args:
+        semaphore: Semaphore bounding how many of the tasks run at once
+        *aws: Coroutines to run
+    
+    Returns:
+        Tasks in the order of aws
+    """
+    async def run(aw):
+        async with semaphore:
+            return await aw
+    
+    return [asyncio.ensure_future(run(aw)) for aw in aws]
+
+
+async def gather_limited(limit: int, *aws):
+    """
+    Like asyncio.gather, but with at most `limit` awaitables running at once
+    
+    Args:
+        limit: Maximum number of concurrently running awaitables
+        *aws: Coroutines to run
+    
+    Returns:
+        List of results in the order of aws
+    """
+    return await asyncio.gather(*create_limited_tasks(asyncio.Semaphore(limit), *aws))
 
 
 class LLMAnalyzer:
@@ -17,21 +350,25 @@ class LLMAnalyzer:
 
     def __init__(self):
         """Initialize the LLM client"""
-        self.client = OpenAI(
+        self.aclient = AsyncOpenAI(
             api_key=config.LLM_API_KEY,
             base_url=config.LLM_BASE_URL
         )
         self.model = config.LLM_MODEL
+        # 趋势总结、今日推荐等短输出使用更便宜的模型
+        self.light_model = config.LLM_MODEL_LIGHT
+        # prompt_tokens / cached_tokens accumulated over all streamed calls
+        self.usage = Counter()
+        self.cache = DiskCache(config.LLM_CACHE_DIR, config.LLM_CACHE_TTL)
+        self.readme_cache = DiskCache(
+            os.path.join(config.LLM_CACHE_DIR, "readme") if config.LLM_CACHE_DIR else "", config.LLM_CACHE_TTL
+        )
 
-    def _build_repos_table(self, repos: List[Dict]) -> str:
-        """Build a markdown table of repositories"""
-        # 按今日star数排序
-        sorted_repos = sorted(repos, key=lambda x: x.get('stars_today', 0), reverse=True)
-        
-        table_parts = [
-            "| 排名 | 项目 | 语言 | 今日 | 总计 | 简介 |",
-            "|:---:|------|:----:|------:|-----:|------|"
-        ]
+    def _build_repos_table(self, sorted_repos: List[Dict]) -> str:
+        """Build a markdown table of repositories already sorted by today's stars"""
+        buf = io.StringIO()
+        buf.write("| 排名 | 项目 | 语言 | 今日 | 总计 | 简介 |\n")
+        buf.write("|:---:|------|:----:|------:|-----:|------|")
         
         for i, repo in enumerate(sorted_repos[:12]):  # 最多显示12个
             rank = i + 1
@@ -40,71 +377,124 @@ class LLMAnalyzer:
             language = repo.get('language', 'Unknown') or 'Unknown'
             stars_today = repo.get('stars_today', 0)
             stars = repo.get('stars', 0)
-            desc = repo.get('description', 'No description') or 'No description'
-            # 截断描述
-            if len(desc) > 30:
-                desc = desc[:27] + "..."
+            desc = truncate_desc(repo.get('description'))
             
-            table_parts.append(
-                f"| {rank} | [{name}]({url}) | {language} | +{stars_today:,} | {stars:,} | {desc} |"
+            buf.write(
+                f"\n| {rank} | [{name}]({url}) | {language} | +{stars_today:,} | {stars:,} | {desc} |"
             )
         
-        return "\n".join(table_parts)
+        return buf.getvalue()
 
     def _build_repos_summary_for_llm(self, repos: List[Dict]) -> str:
         """Build a text summary of repositories for LLM input"""
+        return "\n\n".join(self._build_repo_summary_blocks(repos, config.LLM_MAX_PROMPT_TOKENS))
+
+    def _build_repo_summary_blocks(self, repos: List[Dict], max_tokens: Optional[float] = None) -> List[str]:
+        """
+        Build one numbered summary block per repository for LLM input
+        
+        Args:
+            repos: List of repository dictionaries
+            max_tokens: Approximate token budget of the trend prompt; the repos
+                with the fewest stars today are left out until it fits
+        
+        Returns:
+            Summary blocks in the order of repos
+        """
+        summary_parts = self._format_repo_summary_blocks(repos)
+        if max_tokens is None:
+            return summary_parts
+        
+        # 每个摘要块之间以空行分隔
+        costs = [estimate_tokens(block) + 0.5 for block in summary_parts]
+        total = estimate_tokens(TREND_SYSTEM_PROMPT) + estimate_tokens(TREND_PROMPT) + sum(costs)
+        if total <= max_tokens:
+            return summary_parts
+        
+        dropped = set()
+        for i in sorted(range(len(repos)), key=lambda i: repos[i].get('stars_today', 0)):
+            if total <= max_tokens:
+                break
+            dropped.add(i)
+            total -= costs[i]
+        print(f"  [WARN] Repo summary exceeds {max_tokens} tokens, "
+              f"left out {len(dropped)} repos with the fewest stars today")
+        return self._format_repo_summary_blocks([repo for i, repo in enumerate(repos) if i not in dropped])
+
+    def _format_repo_summary_blocks(self, repos: List[Dict]) -> List[str]:
+        """Format one numbered summary block per repository"""
         summary_parts = []
         for i, repo in enumerate(repos, 1):
-            topics = ", ".join(repo.get("topics", [])[:5]) if repo.get("topics") else "无"
-            summary_parts.append(
-                f"{i}. **{repo.get('full_name', 'Unknown')}** ({repo.get('language', 'Unknown')})\n"
-                f"   - Stars: {repo.get('stars', 0):,} (+{repo.get('stars_today', 0):,} today)\n"
-                f"   - Forks: {repo.get('forks', 0):,}\n"
-                f"   - Description: {repo.get('description', 'No description')}\n"
-                f"   - Topics: {topics}\n"
-                f"   - URL: {repo.get('url', '')}"
-            )
-        return "\n\n".join(summary_parts)
+            topics = ", ".join(repo["topics"][:5]) if repo.get("topics") else "无"
+            fields = ChainMap({"i": i, "topics": topics}, repo, REPO_SUMMARY_DEFAULTS)
+            summary_parts.append(REPO_SUMMARY_TEMPLATE.format_map(fields))
+        return summary_parts
 
-    def _build_detailed_repo_info(self, repo: Dict) -> str:
-        """Build detailed repository info including README excerpt"""
-        info_parts = [
+    def _build_basic_repo_info(self, repo: Dict) -> str:
+        """Build minimal repository info for repos without API enrichment"""
+        return "\n".join([
             f"## 项目: {repo.get('full_name', 'Unknown')}",
             f"- **编程语言**: {repo.get('language', 'Unknown')}",
             f"- **Star 数**: {repo.get('stars', 0):,} (+{repo.get('stars_today', 0):,} today)",
             f"- **Fork 数**: {repo.get('forks', 0):,}",
-            f"- **Open Issues**: {repo.get('open_issues', 0):,}",
-            f"- **License**: {repo.get('license', 'Unknown')}",
             f"- **项目描述**: {repo.get('description', 'No description')}",
-        ]
+        ])
+
+    def _build_detailed_repo_info(self, repo: Dict) -> str:
+        """Build detailed repository info including README excerpt"""
+        # 没有任何 API 补充信息时只输出基本信息
+        if not any(repo.get(key) for key in ("topics", "languages", "recent_commits", "readme_excerpt")):
+            return self._build_basic_repo_info(repo)
+        
+        buf = io.StringIO()
+        buf.write(
+            f"## 项目: {repo.get('full_name', 'Unknown')}\n"
+            f"- **编程语言**: {repo.get('language', 'Unknown')}\n"
+            f"- **Star 数**: {repo.get('stars', 0):,} (+{repo.get('stars_today', 0):,} today)\n"
+            f"- **Fork 数**: {repo.get('forks', 0):,}\n"
+            f"- **Open Issues**: {repo.get('open_issues', 0):,}\n"
+            f"- **License**: {repo.get('license', 'Unknown')}\n"
+            f"- **项目描述**: {repo.get('description', 'No description')}"
+        )
         
         # Topics
         if repo.get("topics"):
-            info_parts.append(f"- **Topics**: {', '.join(repo['topics'][:10])}")
+            buf.write(f"\n- **Topics**: {', '.join(repo['topics'][:10])}")
         
-        # Languages breakdown
-        if repo.get("languages"):
-            total = sum(repo["languages"].values())
+        # Languages breakdown (top 5 by size, independent of dict order)
+        languages = repo.get("languages")
+        if languages:
+            total = sum(languages.values())
             if total > 0:
-                lang_breakdown = ", ".join([
-                    f"{lang}: {bytes/total*100:.1f}%" 
-                    for lang, bytes in list(repo["languages"].items())[:5]
-                ])
-                info_parts.append(f"- **语言分布**: {lang_breakdown}")
+                scale = 100 / total
+                lang_breakdown = ", ".join(
+                    f"{lang}: {size * scale:.1f}%"
+                    for lang, size in heapq.nlargest(5, languages.items(), key=itemgetter(1))
+                )
+                buf.write(f"\n- **语言分布**: {lang_breakdown}")
         
         # Recent commits
         if repo.get("recent_commits"):
-            info_parts.append("\n**最近提交**:")
+            buf.write("\n\n**最近提交**:")
             for commit in repo["recent_commits"][:3]:
-                info_parts.append(f"  - [{commit['sha']}] {commit['message']}")
+                buf.write(f"\n  - [{commit['sha']}] {commit['message']}")
         
         # README excerpt
         if repo.get("readme_excerpt"):
-            # 截取 README 的前 800 字符
-            readme = repo["readme_excerpt"][:800]
-            info_parts.append(f"\n**README 摘要**:\n```\n{readme}\n```")
+            # 去掉徽章等噪声后按信息量挑选句子，控制在 token 预算内
+            readme = self._compress_readme_cached(repo["readme_excerpt"])
+            buf.write(f"\n\n**README 摘要**:\n```\n{readme}\n```")
         
-        return "\n".join(info_parts)
+        return buf.getvalue()
+
+    def _compress_readme_cached(self, readme: str) -> str:
+        """Compress a README excerpt, reusing the result for READMEs seen in earlier runs"""
+        key = make_key("readme", readme, config.LLM_README_TOKEN_BUDGET)
+        compressed = self.readme_cache.get(key)
+        if compressed is None:
+            compressed = compress_readme(readme, config.LLM_README_TOKEN_BUDGET)
+            self.readme_cache.set(key, compressed)
+        return compressed
 
     def _categorize_repos(self, repos: List[Dict]) -> Dict[str, int]:
         """Categorize repositories by domain/type"""
@@ -124,31 +514,24 @@ class LLMAnalyzer:
             "其他": 0,
         }
         
-        # 简单的关键词分类
+        # 简单的关键词分类：一次扫描找出所有命中的关键词，取优先级最高的分类
         for repo in repos:
-            desc = (repo.get('description', '') or '').lower()
-            name = (repo.get('full_name', '') or '').lower()
-            topics = [t.lower() for t in repo.get('topics', [])]
-            combined = f"{desc} {name} {' '.join(topics)}"
+            # 一次拼接后统一转小写，而不是逐个字段处理
+            combined = " ".join((
+                repo.get('description') or '',
+                repo.get('full_name') or '',
+                *repo.get('topics', [])
+            )).casefold()
+            
+            best = len(CATEGORY_KEYWORDS)
+            for match in CATEGORY_PATTERN.finditer(combined):
+                best = min(best, KEYWORD_RANK[match.group(1)])
+                if best == 0:
+                    # 已命中最高优先级分类，无需继续扫描
+                    break
             
-            if any(kw in combined for kw in ['ai', 'ml', 'machine learning', 'llm', 'gpt', 'claude', 'agent', 'neural', 'deep learning']):
-                categories["AI/ML 工具"] += 1
-            elif any(kw in combined for kw in ['framework', 'fullstack', 'react', 'vue', 'angular', 'dioxus', 'flutter']):
-                categories["开发框架"] += 1
-            elif any(kw in combined for kw in ['video', 'audio', 'media', 'cam', 'face', 'image', 'deepfake']):
-                categories["多媒体应用"] += 1
-            elif any(kw in combined for kw in ['home', 'assistant', 'smart', 'iot', 'automation']):
-                categories["智能家居"] += 1
-            elif any(kw in combined for kw in ['iptv', 'streaming', 'tv', 'channel']):
-                categories["媒体资源"] += 1
-            elif any(kw in combined for kw in ['project', 'management', 'kanban', 'task']):
-                categories["项目管理"] += 1
-            elif any(kw in combined for kw in ['cli', 'tool', 'utility', 'terminal', 'shell']):
-                categories["开发工具"] += 1
-            elif any(kw in combined for kw in ['crawler', 'scraper', 'data', 'analysis', 'analytics']):
-                categories["数据分析"] += 1
-            elif any(kw in combined for kw in ['security', 'crypto', 'encryption', 'auth']):
-                categories["安全工具"] += 1
+            if best < len(CATEGORY_KEYWORDS):
+                categories[CATEGORY_KEYWORDS[best][0]] += 1
             else:
                 categories["其他"] += 1
         
@@ -163,51 +546,110 @@ class LLMAnalyzer:
         max_count = max(categories.values())
         max_bar_width = 24
         
-        lines = ["```"]
-        lines.append("┌─────────────────────────────────────────────────────────────────┐")
+        buf = io.StringIO()
+        buf.write("```\n")
+        buf.write("┌─────────────────────────────────────────────────────────────────┐\n")
         
         for category, count in sorted(categories.items(), key=lambda x: -x[1]):
             bar_width = int((count / max_count) * max_bar_width)
-            bar = "█" * bar_width
-            padding = " " * (max_bar_width - bar_width)
-            lines.append(f"│  {category:<16} {bar}{padding}  {count} 个项目{' ' * 8}│")
+            # 条形与右侧补白由格式说明一次完成
+            buf.write(f"│  {category:<16} {'█' * bar_width:<{max_bar_width}}  {count} 个项目{'':8}│\n")
         
-        lines.append("└─────────────────────────────────────────────────────────────────┘")
-        lines.append("```")
+        buf.write("└─────────────────────────────────────────────────────────────────┘\n")
+        buf.write("```")
         
-        return "\n".join(lines)
+        return buf.getvalue()
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def analyze_trends(self, repos: List[Dict]) -> str:
-        """Analyze trending repositories using LLM - generate hot topic summary"""
-        repos_summary = self._build_repos_summary_for_llm(repos)
+    @retry_llm_call
+    async def _stream_chat(self, **kwargs) -> str:
+        """
+        Run a streaming chat completion and collect the generated text
         
-        prompt = f"""你是一位资深的技术分析师，请对以下 GitHub 热门项目进行分析：
-
-## 今日 GitHub Trending 项目列表：
-
-{repos_summary}
+        Args:
+            **kwargs: Arguments passed to chat.completions.create
+        
+        Returns:
+            Full response content
+        """
+        stream = await self.aclient.chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **kwargs
+        )
+        pieces = []
+        async for chunk in stream:
+            if chunk.choices:
+                pieces.append(chunk.choices[0].delta.content or "")
+            if chunk.usage:
+                self._record_usage(chunk.usage)
+        return "".join(pieces)
 
-请用中文提供以下内容：
+    async def _cached_chat(self, cache_key: Optional[str] = None, **kwargs) -> str:
+        """
+        Run a streaming chat completion, reusing a cached response when available
+        
+        Args:
+            cache_key: Cache key, defaults to a hash of the full request
+            **kwargs: Arguments passed to chat.completions.create
+        
+        Returns:
+            Full response content
+        """
+        if cache_key is None:
+            cache_key = make_key(kwargs)
+        
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        content = await self._stream_chat(**kwargs)
+        if content:
+            self.cache.set(cache_key, content)
+        return content
 
-### 热点总结
-用一段话（50-80字）概括今日GitHub热榜的主要热点和趋势，要抓住最核心的1-2个趋势。这段话将作为报告的开篇摘要。
+    async def _routed_chat(self, is_valid: Callable[[str], bool], **kwargs) -> str:
+        """
+        Run a short request on the light model, retrying on the main model if its output is malformed
+        
+        Args:
+            is_valid: Check that the response follows the expected format
+            **kwargs: Arguments passed to chat.completions.create, without model
+        
+        Returns:
+            Full response content
+        """
+        content = await self._cached_chat(model=self.light_model, **kwargs)
+        if self.light_model != self.model and not is_valid(content):
+            print(f"  [WARN] {self.light_model} output malformed, retrying with {self.model}")
+            content = await self._cached_chat(model=self.model, **kwargs)
+        return content
 
-### 关键观察
-用3-4个要点（每个20-40字）列出今日最值得关注的技术趋势或现象，使用 markdown 加粗标注关键词。
+    def _record_usage(self, usage) -> None:
+        """Accumulate prompt and cache-hit token counts from a completion's usage"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.usage["prompt_tokens"] += usage.prompt_tokens or 0
+        self.usage["cached_tokens"] += (getattr(details, "cached_tokens", None) or 0) if details else 0
 
-格式要求：
-1. 热点总结直接输出一段话，不需要标题
-2. 关键观察用 "- **关键词**：说明" 的格式
-3. 语言要精炼有力，避免废话
-4. 内容要有洞察力，不要泛泛而谈"""
+    async def analyze_trends(self, repos: List[Dict], repos_summary: Optional[str] = None) -> str:
+        """
+        Analyze trending repositories using LLM - generate hot topic summary
+        
+        Args:
+            repos: List of repository dictionaries
+            repos_summary: Prebuilt summary of repos, built from repos if omitted
+        
+        Returns:
+            Trend analysis text
+        """
+        if repos_summary is None:
+            repos_summary = self._build_repos_summary_for_llm(repos)
+        
+        prompt = TREND_PROMPT.format(repos_summary=repos_summary)
 
-        response = self.client.chat.completions.create(
-            model=self.model,
+        return await self._routed_chat(
+            lambda content: "### 热点总结" in content,
             messages=[
                 {
                     "role": "system",
-                    "content": "你是一位专业的技术分析师，擅长用精炼的语言总结技术趋势。你的分析应该有洞察力、有深度。"
+                    "content": TREND_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -217,11 +659,8 @@ class LLMAnalyzer:
             temperature=0.7,
             max_tokens=1000
         )
-        
-        return response.choices[0].message.content
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def analyze_single_repo_detailed(self, repo: Dict, rank: int) -> str:
+    async def analyze_single_repo_detailed(self, repo: Dict, rank: int) -> str:
         """
         Analyze a single repository in detail with new format
         
@@ -232,114 +671,155 @@ class LLMAnalyzer:
         Returns:
             Detailed analysis text in new format
         """
-        repo_info = self._build_detailed_repo_info(repo)
-        
-        prompt = f"""请对以下 GitHub 项目进行深度分析，生成结构化的报告：
-
-{repo_info}
-
-请严格按照以下格式输出（使用中文）：
-
-### {rank}. {repo.get('full_name', 'Unknown')} — [项目简短定位，5-10个字]
-
-> **一句话总结**：[用一句话概括项目的核心价值和特点，30-50字]
-
-#### 价值主张
-
-| 维度 | 说明 |
-|------|------|
-| **解决痛点** | [项目解决的核心问题，20-40字] |
-| **目标用户** | [主要使用人群，15-30字] |
-| **核心亮点** | [3-5个关键特性，用 + 连接] |
-
-#### 技术架构
-
-[如果项目有明确的技术流程，用mermaid图展示，格式如下：]
-```mermaid
-graph LR
-    A[输入] --> B[处理]
-    B --> C[输出]
-```
-
-**技术特色**：
-- [技术亮点1，15-30字]
-- [技术亮点2，15-30字]
-- [技术亮点3，15-30字]
-
-#### 热度分析
-
-- [基于Star/Fork数据的增长分析，20-40字]
-- [社区活跃度或生态位置分析，20-40字]
-
-#### 快速上手
-
-```bash
-# 简洁的上手命令示例（2-4行）
-```
-
-#### 注意事项
-
-- [注意事项1]
-- [注意事项2]
-
----
+        content = await self._cached_chat(
+            cache_key=self._detail_cache_key(repo), **self._build_detail_request(repo, rank)
+        )
+        return DETAIL_RANK_PATTERN.sub(f"### {rank}.", content, count=1)
 
-要求：
-1. 内容要精炼，避免冗长
-2. 技术分析要有深度和洞察
-3. mermaid图要简洁清晰，节点不超过6个
-4. 代码示例要实用可运行
-5. 如果项目信息不足以生成mermaid图，可以省略该部分
-6. 不要使用emoji"""
+    def _detail_cache_key(self, repo: Dict) -> str:
+        """
+        Build the cache key of a detailed analysis
+        
+        Projects often stay on the trending list for days. The key only covers the
+        inputs that stay stable between daily runs, so an unchanged project reuses
+        its analysis; the rank is rewritten on a cache hit, and the daily figures
+        (today's stars, forks, issues, commits) are accepted as possibly stale,
+        with stars only counting by bucket of 100.
+        """
+        readme = repo.get("readme_excerpt")
+        return make_key(
+            "detail",
+            self.model,
+            DETAIL_SYSTEM_PROMPT,
+            DETAIL_PROMPT,
+            repo.get("full_name"),
+            repo.get("description"),
+            repo.get("language"),
+            repo.get("topics") or [],
+            self._compress_readme_cached(readme) if readme else None,
+            repo.get("stars", 0) // 100
+        )
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+    def _build_detail_request(self, repo: Dict, rank: int) -> Dict:
+        """Build the chat completion arguments for a detailed repository analysis"""
+        repo_info = self._build_detailed_repo_info(repo)
+        
+        prompt = DETAIL_PROMPT.format(
+            repo_info=repo_info, rank=rank, full_name=repo.get('full_name', 'Unknown')
+        )
+        
+        return {
+            "model": self.model,
+            "messages": [
                 {
                     "role": "system",
-                    "content": "你是一位资深的开源项目分析师，擅长用结构化、精炼的方式解读项目。你的分析要有技术深度，格式要严格遵循模板。"
+                    "content": DETAIL_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
                     "content": prompt
                 }
             ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        return response.choices[0].message.content
+            "temperature": 0.7,
+            "max_tokens": 2000
+        }
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def generate_recommendations(self, repos: List[Dict]) -> str:
-        """Generate recommendation table based on different scenarios"""
-        repos_summary = self._build_repos_summary_for_llm(repos[:10])
+    async def _analyze_repos_batched(self, repos: List[Dict], start_rank: int = 1) -> List[Tuple[str, str]]:
+        """
+        Analyze repositories in detail through the Batch API (half price, higher latency)
         
-        prompt = f"""基于以下GitHub热门项目，生成一个推荐表格：
-
-{repos_summary}
-
-请生成一个markdown表格，格式如下：
-
-| 主题 | 推荐项目 | 亮点 |
-|------|----------|------|
-| [使用场景1] | [项目名](URL) | [一句话亮点] |
-| [使用场景2] | [项目名](URL) | [一句话亮点] |
-| [使用场景3] | [项目名](URL) | [一句话亮点] |
-| [使用场景4] | [项目名](URL) | [一句话亮点] |
+        Args:
+            repos: Repositories to analyze, in rank order
+            start_rank: Rank of the first repository
+        
+        Returns:
+            List of (markdown content, separator) tuples in rank order
+        """
+        ranked = list(enumerate(repos, start_rank))
+        try:
+            lines = [
+                orjson.dumps({
+                    "custom_id": f"repo-{rank}",
+                    "method": "POST",
+                    "url": config.LLM_BATCH_ENDPOINT,
+                    "body": self._build_detail_request(repo, rank)
+                })
+                for rank, repo in ranked
+            ]
+            input_file = await self.aclient.files.create(
+                file=("detailed_analysis.jsonl", b"\n".join(lines)),
+                purpose="batch"
+            )
+            batch = await self.aclient.batches.create(
+                input_file_id=input_file.id,
+                endpoint=config.LLM_BATCH_ENDPOINT,
+                completion_window="24h"
+            )
+            print(f"  Submitted batch {batch.id} with {len(lines)} requests, waiting...")
+            
+            # 指数退避轮询批处理状态
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + config.LLM_BATCH_TIMEOUT
+            delay = 10
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                if loop.time() > deadline:
+                    await self.aclient.batches.cancel(batch.id)
+                    raise TimeoutError(f"batch {batch.id} did not finish in time")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 300)
+                batch = await self.aclient.batches.retrieve(batch.id)
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                raise RuntimeError(f"batch {batch.id} ended with status {batch.status}")
+            
+            output = await self.aclient.files.content(batch.output_file_id)
+            contents = {}
+            for line in output.text.splitlines():
+                if not line.strip():
+                    continue
+                item = orjson.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    contents[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        except Exception as e:
+            print(f"  [WARN] Batch analysis failed, analyzing directly: {e}")
+            return await gather_limited(
+                config.LLM_MAX_CONCURRENCY,
+                *[self._analyze_repo_safe(repo, rank) for rank, repo in ranked]
+            )
+        
+        results = []
+        for rank, repo in ranked:
+            content = contents.get(f"repo-{rank}")
+            if content:
+                results.append((content, "\n"))
+            else:
+                print(f"  [WARN] No batch result for {repo.get('full_name')}")
+                results.append((self._generate_fallback_analysis(repo, rank), "\n---\n"))
+        return results
 
-要求：
-1. 选择4-5个不同的使用场景
-2. 场景要具体，如"想入坑AI开发"、"学习新框架"等
-3. 每个亮点不超过15字
-4. 只输出表格，不要其他内容"""
+    async def generate_recommendations(self, repos: List[Dict], repos_summary: Optional[str] = None) -> str:
+        """
+        Generate recommendation table based on different scenarios
+        
+        Args:
+            repos: List of repository dictionaries
+            repos_summary: Prebuilt summary of the first 10 repos, built from repos if omitted
+        
+        Returns:
+            Markdown recommendation table
+        """
+        if repos_summary is None:
+            repos_summary = self._build_repos_summary_for_llm(repos[:10])
+        
+        prompt = RECOMMEND_PROMPT.format(repos_summary=repos_summary)
 
-        response = self.client.chat.completions.create(
-            model=self.model,
+        return await self._routed_chat(
+            lambda content: "|" in content,
             messages=[
                 {
                     "role": "system",
-                    "content": "你是一位技术顾问，擅长根据用户需求推荐合适的开源项目。"
+                    "content": RECOMMEND_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -349,10 +829,53 @@ graph LR
             temperature=0.7,
             max_tokens=500
         )
+
+    async def analyze_merged(self, repos_summary: str, top_repos: List[Dict]) -> Optional[Tuple[str, List[str]]]:
+        """
+        Analyze trends and the top repositories with a single structured LLM request
         
-        return response.choices[0].message.content
+        Args:
+            repos_summary: Summary of all trending repositories
+            top_repos: Repositories to analyze in detail, in rank order
+        
+        Returns:
+            Tuple of (trend analysis, detailed analyses in rank order), or None if the
+            response could not be used and the per-call path should run instead
+        """
+        repos_info = "\n\n".join(
+            f"### 序号 {rank}\n{self._build_detailed_repo_info(repo)}"
+            for rank, repo in enumerate(top_repos, 1)
+        )
+        prompt = MERGED_PROMPT.format(repos_summary=repos_summary, repos_info=repos_info)
+        
+        try:
+            content = await self._stream_chat(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": MERGED_SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.7,
+                max_tokens=2000 * len(top_repos) + 1000
+            )
+            result = orjson.loads(content)
+            analyses = {p["full_name"]: p["analysis"] for p in result["projects"]}
+            details = [analyses[repo.get("full_name")] for repo in top_repos]
+            return result["overall_trend"], details
+        except Exception as e:
+            # 输出被截断或格式不符时，JSON 解析会失败
+            print(f"  [WARN] Merged analysis unusable, falling back to separate calls: {e}")
+            return None
 
-    def generate_daily_report(self, repos: List[Dict], date_str: str, detailed_analysis: bool = True) -> str:
+    def generate_daily_report(self, repos: List[Dict], date_str: str, detailed_analysis: bool = True,
+                              merged_analysis: bool = False, batch_analysis: bool = False) -> str:
         """
         Generate a complete daily report with new beautiful format
         
@@ -360,13 +883,91 @@ graph LR
             repos: List of repository dictionaries
             date_str: Date string for the report
             detailed_analysis: Whether to include detailed analysis for top projects
+            merged_analysis: Whether to analyze trends and the top projects in one LLM request
+            batch_analysis: Whether to run per-project analyses through the Batch API
         
         Returns:
             Complete markdown report with Docusaurus frontmatter
         """
-        # 获取热点总结
-        print("Generating trend analysis...")
-        trend_analysis = self.analyze_trends(repos)
+        buf = io.StringIO()
+        self.write_daily_report(buf, repos, date_str, detailed_analysis, merged_analysis, batch_analysis)
+        return buf.getvalue()
+
+    def write_daily_report(self, out: TextIO, repos: List[Dict], date_str: str, detailed_analysis: bool = True,
+                           merged_analysis: bool = False, batch_analysis: bool = False) -> None:
+        """
+        Write the daily report to a text stream as its sections become ready
+        
+        All LLM requests start at once; each section is written as soon as it
+        and everything before it have finished, so the head of the report is
+        available without waiting for the slowest project analysis.
+        
+        Args:
+            out: Text stream receiving the markdown report, e.g. an open file
+            repos: List of repository dictionaries
+            date_str: Date string for the report
+            detailed_analysis: Whether to include detailed analysis for top projects
+            merged_analysis: Whether to analyze trends and the top projects in one LLM request
+            batch_analysis: Whether to run per-project analyses through the Batch API
+        """
+        asyncio.run(self._write_daily_report_async(
+            out, repos, date_str, detailed_analysis, merged_analysis, batch_analysis
+        ))
+
+    async def _write_daily_report_async(self, out: TextIO, repos: List[Dict], date_str: str,
+                                        detailed_analysis: bool, merged_analysis: bool,
+                                        batch_analysis: bool) -> None:
+        """Async implementation of write_daily_report"""
+        # 没有项目或今日都没有新增 star 时不值得调用 LLM，直接输出基础报告
+        if max((repo.get('stars_today', 0) for repo in repos), default=0) == 0:
+            print("No repositories gained stars today, writing basic report without LLM analysis")
+            out.write(generate_basic_report(repos, date_str))
+            return
+        
+        # 按今日star数只排序一次，表格、推荐与深度解读共用；全部项目都进行深度解读
+        sorted_repos = sorted(repos, key=itemgetter('stars_today'), reverse=True)
+        top_repos = sorted_repos if detailed_analysis else []
+        
+        # 项目摘要只构建一次，热点总结和今日推荐共用
+        summary_blocks = self._build_repo_summary_blocks(repos, config.LLM_MAX_PROMPT_TOKENS)
+        
+        repos_summary = "\n\n".join(summary_blocks)
+        
+        # 合并模式下头部项目与热点总结一起分析，其余项目单独解读
+        head_count = config.LLM_MERGED_TOP_N if merged_analysis else 0
+        head_repos, rest_repos = top_repos[:head_count], top_repos[head_count:]
+        
+        # 批处理模式下其余项目通过 Batch API 一次提交
+        if batch_analysis:
+            rest_coros = [self._analyze_repos_batched(rest_repos, head_count + 1)] if rest_repos else []
+        else:
+            rest_coros = [self._analyze_repo_safe(repo, i) for i, repo in enumerate(rest_repos, head_count + 1)]
+        
+        # 热点总结、今日推荐与各项目深度解读互不依赖，限流并发请求 LLM
+        print("Generating trend analysis, recommendations and project analysis...")
+        semaphore = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY)
+        first_task, recommendations_task, *rest_tasks = create_limited_tasks(
+            semaphore,
+            self.analyze_merged(repos_summary, head_repos) if head_repos
+            else self.analyze_trends(repos, repos_summary=repos_summary),
+            self._generate_recommendations_safe(sorted_repos, "\n\n".join(summary_blocks[:10])),
+            *rest_coros
+        )
+        
+        first = await first_task
+        if not head_repos:
+            trend_analysis, head_details = first, []
+        elif first:
+            trend_analysis, merged_details = first
+            head_details = [(detailed, "\n") for detailed in merged_details]
+        else:
+            # 合并请求不可用，退回单独请求
+            trend_task, *head_details = create_limited_tasks(
+                semaphore,
+                self.analyze_trends(repos, repos_summary=repos_summary),
+                *[self._analyze_repo_safe(repo, i) for i, repo in enumerate(head_repos, 1)]
+            )
+            trend_analysis = await trend_task
         
         # 解析热点总结
         hot_topic = ""
@@ -390,131 +991,192 @@ graph LR
         categories = self._categorize_repos(repos)
         category_chart = self._build_category_chart(categories)
         
+        def emit(*parts: str) -> None:
+            for part in parts:
+                out.write(part)
+                out.write("\n")
+        
         # 构建报告
-        report_parts = [
-            "---",
-            "sidebar_position: 1",
-            f"title: {date_str} 日报",
-            f"description: GitHub Trending 每日热门项目报告 - {date_str}",
-            "---\n",
+        emit(
+            REPORT_FRONTMATTER.substitute(date_str=date_str),
             f"## 今日热点\n",
             f"{hot_topic}\n",
             "---\n",
             "## 热门项目一览\n",
-            self._build_repos_table(repos),
+            self._build_repos_table(sorted_repos),
             "\n---\n",
             "## 趋势洞察\n",
             category_chart,
-        ]
+        )
         
         # 添加关键观察
         if key_observations:
-            report_parts.extend([
+            emit(
                 "\n**关键观察**：",
                 key_observations,
-            ])
+            )
         
-        report_parts.append("\n---\n")
+        emit("\n---\n")
         
-        # 深度解读
+        # 深度解读，按排名顺序写出已完成的项目
         if detailed_analysis:
-            report_parts.append("## 项目深度解读\n")
+            emit("## 项目深度解读\n")
             
-            # 按今日star数排序，全部项目都进行深度解读
-            top_repos = sorted(repos, key=lambda x: x.get('stars_today', 0), reverse=True)
-            
-            for i, repo in enumerate(top_repos, 1):
-                print(f"  Analyzing project {i}/{len(top_repos)}: {repo.get('full_name')}...")
-                
-                try:
-                    detailed = self.analyze_single_repo_detailed(repo, i)
-                    report_parts.append(detailed)
-                    report_parts.append("\n")
-                except Exception as e:
-                    print(f"  [WARN] Error analyzing {repo.get('full_name')}: {e}")
-                    # 生成简化版本
-                    report_parts.append(self._generate_fallback_analysis(repo, i))
-                    report_parts.append("\n---\n")
+            if batch_analysis:
+                rest_tasks = await rest_tasks[0] if rest_tasks else []
+            for detail in head_details + rest_tasks:
+                detailed, separator = await detail if asyncio.isfuture(detail) else detail
+                emit(f"{detailed}\n{separator}")
         
         # 今日推荐
-        report_parts.append("## 今日推荐\n")
-        try:
-            print("Generating recommendations...")
-            recommendations = self.generate_recommendations(repos)
-            # 检查是否为空，如果为空则使用 fallback
-            if recommendations and recommendations.strip():
-                report_parts.append(recommendations)
-            else:
-                print("  Recommendations empty, using fallback...")
-                report_parts.append(self._generate_fallback_recommendations(repos))
-        except Exception as e:
-            print(f"  Error generating recommendations: {e}")
-            report_parts.append(self._generate_fallback_recommendations(repos))
+        emit("## 今日推荐\n")
+        emit(await recommendations_task)
+        
+        if self.usage["prompt_tokens"]:
+            print(f"  LLM prompt tokens: {self.usage['prompt_tokens']:,}, "
+                  f"cached: {self.usage['cached_tokens']:,} "
+                  f"({self.usage['cached_tokens'] / self.usage['prompt_tokens']:.0%})")
         
         # Footer
-        report_parts.extend([
+        emit(
             "\n---\n",
             '<div align="center">\n',
             f"*Generated on {date_str} | Powered by GitHub Trending Reporter*\n",
             "</div>"
-        ])
+        )
+
+    async def _generate_recommendations_safe(self, sorted_repos: List[Dict], repos_summary: str) -> str:
+        """Generate recommendations, falling back to a basic table on failure or empty output"""
+        try:
+            recommendations = await self.generate_recommendations(sorted_repos, repos_summary=repos_summary)
+            # 检查是否为空，如果为空则使用 fallback
+            if recommendations and recommendations.strip():
+                return recommendations
+            print("  Recommendations empty, using fallback...")
+        except Exception as e:
+            print(f"  Error generating recommendations: {e}")
+        return self._generate_fallback_recommendations(sorted_repos)
+
+    async def _analyze_repo_safe(self, repo: Dict, rank: int) -> Tuple[str, str]:
+        """
+        Analyze a single repository, falling back to a basic summary on failure
+        
+        Args:
+            repo: Repository dictionary with enriched data
+            rank: Rank of the repository
         
-        return "\n".join(report_parts)
+        Returns:
+            Tuple of (markdown content, separator to append after it)
+        """
+        print(f"  Analyzing project {rank}: {repo.get('full_name')}...")
+        try:
+            return await self.analyze_single_repo_detailed(repo, rank), "\n"
+        except Exception as e:
+            print(f"  [WARN] Error analyzing {repo.get('full_name')}: {e}")
+            # 生成简化版本
+            return self._generate_fallback_analysis(repo, rank), "\n---\n"
 
     def _generate_fallback_analysis(self, repo: Dict, rank: int) -> str:
         """Generate a fallback analysis when LLM fails"""
         name = repo.get('full_name', 'Unknown')
-        desc = repo.get('description', 'No description')
+        fields = ChainMap(
+            {"rank": rank, "url": repo.get('url', f'https://github.com/{name}')}, repo, REPO_SUMMARY_DEFAULTS
+        )
+        return FALLBACK_ANALYSIS_TEMPLATE.format_map(fields)
+
+    def _generate_fallback_recommendations(self, sorted_repos: List[Dict]) -> str:
+        """Generate fallback recommendations from repos sorted by today's stars when LLM fails"""
+        top_repos = sorted_repos[:4]
+        
+        table_parts = [FALLBACK_RECOMMEND_HEADER]
+        
+        for scenario, repo in zip(FALLBACK_RECOMMEND_SCENARIOS, top_repos):
+            name = repo.get('full_name', 'Unknown')
+            table_parts.append(FALLBACK_RECOMMEND_ROW.format(
+                scenario=scenario,
+                name=name,
+                url=repo.get('url', f'https://github.com/{name}'),
+                desc=truncate_desc(repo.get('description'), 20)
+            ))
+        
+        return "\n".join(table_parts)
+
+
+def generate_basic_report(repos: List[Dict], date_str: str) -> str:
+    """
+    Generate a basic report without LLM analysis (new beautiful format)
+    
+    Args:
+        repos: List of repository dictionaries
+        date_str: Date string
+    
+    Returns:
+        Basic markdown report with Docusaurus frontmatter
+    """
+    # 按今日star数排序
+    sorted_repos = sorted(repos, key=itemgetter('stars_today'), reverse=True)
+    
+    buf = io.StringIO()
+    buf.write(REPORT_FRONTMATTER.substitute(date_str=date_str))
+    buf.write("\n## 今日热点\n\n")
+    buf.write(f"今日 GitHub 热榜共收录 **{len(repos)}** 个热门项目。\n\n")
+    buf.write("---\n\n")
+    buf.write("## 热门项目一览\n\n")
+    buf.write("| 排名 | 项目 | 语言 | 今日 | 总计 | 简介 |\n")
+    buf.write("|:---:|------|:----:|------:|-----:|------|\n")
+    
+    for i, repo in enumerate(sorted_repos[:12]):
+        rank = i + 1
+        name = repo.get('full_name', 'Unknown')
+        url = repo.get('url', f"https://github.com/{name}")
+        language = repo.get('language', 'Unknown') or 'Unknown'
+        stars_today = repo.get('stars_today', 0)
+        stars = repo.get('stars', 0)
+        desc = truncate_desc(repo.get('description'))
+        
+        buf.write(f"| {rank} | [{name}]({url}) | {language} | +{stars_today:,} | {stars:,} | {desc} |\n")
+    
+    # 简单项目列表
+    buf.write("\n---\n\n")
+    buf.write("## 项目详情\n\n")
+    
+    for i, repo in enumerate(sorted_repos[:5], 1):
+        name = repo.get('full_name', 'Unknown')
+        url = repo.get('url', f"https://github.com/{name}")
+        desc = repo.get('description', 'No description') or 'No description'
         language = repo.get('language', 'Unknown')
         stars = repo.get('stars', 0)
         stars_today = repo.get('stars_today', 0)
-        url = repo.get('url', f'https://github.com/{name}')
+        forks = repo.get('forks', 0)
         
-        return f"""### {rank}. {name}
+        buf.write(f"""### {i}. {name}
 
-> **项目简介**：{desc}
+> {desc}
 
-#### 🎯 基本信息
-
-| 维度 | 说明 |
+| 指标 | 数值 |
 |------|------|
-| **语言** | {language} |
-| **今日Star** | +{stars_today:,} |
-| **总Star** | {stars:,} |
-
-#### 🔗 链接
+| 语言 | {language} |
+| 今日 | +{stars_today:,} |
+| 总计 | {stars:,} |
+| Forks | {forks:,} |
 
-- GitHub: [{name}]({url})
+[GitHub]({url})
 
----"""
+---
 
-    def _generate_fallback_recommendations(self, repos: List[Dict]) -> str:
-        """Generate fallback recommendations when LLM fails"""
-        top_repos = sorted(repos, key=lambda x: x.get('stars_today', 0), reverse=True)[:4]
-        
-        table_parts = [
-            "| 主题 | 推荐项目 | 亮点 |",
-            "|------|----------|------|"
-        ]
-        
-        scenarios = ["今日最热", "值得关注", "快速上手", "长期潜力"]
-        
-        for i, repo in enumerate(top_repos):
-            name = repo.get('full_name', 'Unknown')
-            url = repo.get('url', f'https://github.com/{name}')
-            desc = repo.get('description', 'No description') or 'No description'
-            if len(desc) > 20:
-                desc = desc[:17] + "..."
-            
-            table_parts.append(f"| {scenarios[i]} | [{name}]({url}) | {desc} |")
-        
-        return "\n".join(table_parts)
+""")
+    
+    buf.write('<div align="center">\n\n')
+    buf.write(f"*Generated on {date_str} | Powered by GitHub Trending Reporter*\n\n")
+    buf.write("</div>\n")
+    
+    return buf.getvalue()
 
 
 def analyze_trending(repos: List[Dict], analysis_type: str = "comprehensive") -> str:
     """Convenience function to analyze trending repositories"""
     analyzer = LLMAnalyzer()
-    return analyzer.analyze_trends(repos)
+    return asyncio.run(analyzer.analyze_trends(repos))
 
 
 if __name__ == "__main__":
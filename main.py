@@ -6,15 +6,20 @@
 """
 
 import argparse
+import logging
+import os
 import sys
 from datetime import datetime
 from typing import Optional
 
 from trending_scraper import fetch_trending
-from llm_analyzer import LLMAnalyzer
-from data_pusher import DataPusher
+from llm_analyzer import LLMAnalyzer, generate_basic_report
+from data_pusher import get_pusher
 import config
 
+# Directory of the local report and raw data files
+OUTPUT_DIR = "output"
+
 
 def run_report(
     language: Optional[str] = None,
@@ -23,7 +28,9 @@ def run_report(
     push_to_repo: bool = True,
     output_local: bool = False,
     date_str: Optional[str] = None,
-    detailed_analysis: bool = True
+    detailed_analysis: bool = True,
+    merged_analysis: bool = False,
+    batch_analysis: bool = False
 ) -> bool:
     """
     Run the complete trending report workflow
@@ -36,6 +43,8 @@ def run_report(
         output_local: Whether to save results locally
         date_str: Override date string (for testing)
         detailed_analysis: Whether to include detailed analysis for top projects
+        merged_analysis: Whether to analyze trends and top projects in one LLM request
+        batch_analysis: Whether to run per-project analyses through the LLM Batch API
     
     Returns:
         True if successful
@@ -48,6 +57,8 @@ def run_report(
     print(f"  Time range: {since}")
     print(f"  Analysis type: {analysis_type}")
     print(f"  Detailed analysis: {'Yes' if detailed_analysis else 'No'}")
+    print(f"  Merged analysis: {'Yes' if merged_analysis else 'No'}")
+    print(f"  Batch analysis: {'Yes' if batch_analysis else 'No'}")
     print()
     
     # Step 1: Fetch trending repositories
@@ -63,11 +74,29 @@ def run_report(
         print("[WARN] No repositories found")
         return False
     
+    # 项目太少时深度解读意义不大
+    if detailed_analysis and len(repos) < 3:
+        print("  Too few repositories, skipping detailed analysis")
+        detailed_analysis = False
+    
     # Step 2: Analyze with LLM
     print("[2/4] Analyzing with LLM...")
+    report = None
+    report_path = os.path.join(OUTPUT_DIR, f"{date_str}.md")
     try:
         analyzer = LLMAnalyzer()
-        report = analyzer.generate_daily_report(repos, date_str, detailed_analysis=detailed_analysis)
+        report_options = {
+            "detailed_analysis": detailed_analysis,
+            "merged_analysis": merged_analysis,
+            "batch_analysis": batch_analysis,
+        }
+        if output_local:
+            # 本地输出时各部分生成后直接写入文件，不在内存中拼接整份报告
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            with open(report_path, "w", encoding="utf-8") as f:
+                analyzer.write_daily_report(f, repos, date_str, **report_options)
+        else:
+            report = analyzer.generate_daily_report(repos, date_str, **report_options)
         print("  Analysis complete")
     except Exception as e:
         print(f"[ERROR] LLM analysis: {e}")
@@ -88,9 +117,12 @@ def run_report(
     if push_to_repo:
         print("[4/4] Pushing to repository...")
         try:
-            pusher = DataPusher()
+            if report is None:
+                # 报告已流式写入本地文件，推送时再读回
+                with open(report_path, encoding="utf-8") as f:
+                    report = f.read()
+            pusher = get_pusher()
             results = pusher.push_all(repos, report, date_str)
-            pusher.update_readme(date_str)
             
             if results["raw_data"] and results["report"]:
                 print("  Successfully pushed to repository")
@@ -106,118 +138,34 @@ def run_report(
     return True
 
 
-def generate_basic_report(repos: list, date_str: str) -> str:
-    """
-    Generate a basic report without LLM analysis (new beautiful format)
-    
-    Args:
-        repos: List of repository dictionaries
-        date_str: Date string
-    
-    Returns:
-        Basic markdown report with Docusaurus frontmatter
-    """
-    # 按今日star数排序
-    sorted_repos = sorted(repos, key=lambda x: x.get('stars_today', 0), reverse=True)
-    
-    report_parts = [
-        "---",
-        "sidebar_position: 1",
-        f"title: {date_str} 日报",
-        f"description: GitHub Trending 每日热门项目报告 - {date_str}",
-        "---\n",
-        f"## 今日热点\n",
-        f"今日 GitHub 热榜共收录 **{len(repos)}** 个热门项目。\n",
-        "---\n",
-        "## 热门项目一览\n",
-        "| 排名 | 项目 | 语言 | 今日 | 总计 | 简介 |",
-        "|:---:|------|:----:|------:|-----:|------|",
-    ]
-    
-    for i, repo in enumerate(sorted_repos[:12]):
-        rank = i + 1
-        name = repo.get('full_name', 'Unknown')
-        url = repo.get('url', f"https://github.com/{name}")
-        language = repo.get('language', 'Unknown') or 'Unknown'
-        stars_today = repo.get('stars_today', 0)
-        stars = repo.get('stars', 0)
-        desc = repo.get('description', 'No description') or 'No description'
-        if len(desc) > 30:
-            desc = desc[:27] + "..."
-        
-        report_parts.append(
-            f"| {rank} | [{name}]({url}) | {language} | +{stars_today:,} | {stars:,} | {desc} |"
-        )
-    
-    # 简单项目列表
-    report_parts.extend([
-        "\n---\n",
-        "## 项目详情\n",
-    ])
-    
-    for i, repo in enumerate(sorted_repos[:5], 1):
-        name = repo.get('full_name', 'Unknown')
-        url = repo.get('url', f"https://github.com/{name}")
-        desc = repo.get('description', 'No description') or 'No description'
-        language = repo.get('language', 'Unknown')
-        stars = repo.get('stars', 0)
-        stars_today = repo.get('stars_today', 0)
-        forks = repo.get('forks', 0)
-        
-        report_parts.append(f"""### {i}. {name}
-
-> {desc}
-
-| 指标 | 数值 |
-|------|------|
-| 语言 | {language} |
-| 今日 | +{stars_today:,} |
-| 总计 | {stars:,} |
-| Forks | {forks:,} |
-
-[GitHub]({url})
-
----
-""")
-    
-    report_parts.extend([
-        '<div align="center">\n',
-        f"*Generated on {date_str} | Powered by GitHub Trending Reporter*\n",
-        "</div>"
-    ])
-    
-    return "\n".join(report_parts)
-
-
-def save_local(repos: list, report: str, date_str: str):
+def save_local(repos: list, report: Optional[str], date_str: str):
     """
     Save results to local files
     
     Args:
         repos: List of repository dictionaries
-        report: Markdown report content
+        report: Markdown report content, None if it was already streamed to the report file
         date_str: Date string
     """
-    import json
-    import os
+    import orjson
     
     # Create output directory
-    output_dir = "output"
-    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     
     # Save report
-    report_path = os.path.join(output_dir, f"{date_str}.md")
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write(report)
+    if report is not None:
+        report_path = os.path.join(OUTPUT_DIR, f"{date_str}.md")
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(report)
     
     # Save raw data
-    data_path = os.path.join(output_dir, f"{date_str}.json")
-    with open(data_path, "w", encoding="utf-8") as f:
-        json.dump({
+    data_path = os.path.join(OUTPUT_DIR, f"{date_str}.json")
+    with open(data_path, "wb") as f:
+        f.write(orjson.dumps({
             "date": date_str,
             "total_repos": len(repos),
             "repositories": repos
-        }, f, indent=2, ensure_ascii=False)
+        }, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
 
 def main():
@@ -274,8 +222,23 @@ def main():
         help="Skip detailed analysis for individual projects"
     )
     
+    parser.add_argument(
+        "--merged",
+        action="store_true",
+        help="Analyze trends and top projects in a single LLM request"
+    )
+    
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Run per-project analyses through the LLM Batch API (cheaper, may take hours)"
+    )
+    
     args = parser.parse_args()
     
+    # 爬虫模块通过 logging 输出进度，与 print 的输出格式保持一致
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     success = run_report(
         language=args.language,
         since=args.since,
@@ -283,7 +246,9 @@ def main():
         push_to_repo=not args.no_push,
         output_local=args.local,
         date_str=args.date,
-        detailed_analysis=not args.no_detailed
+        detailed_analysis=not args.no_detailed,
+        merged_analysis=args.merged,
+        batch_analysis=args.batch
     )
     
     sys.exit(0 if success else 1)
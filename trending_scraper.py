@@ -5,16 +5,248 @@
 @desc: Scrape GitHub Trending repositories
 """
 
+import heapq
+import json
+import logging
+import operator
+import re
+import threading
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import orjson
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
-from tenacity import retry, stop_after_attempt, wait_exponential
+from lxml import etree, html as lxml_html
+from typing import Any, List, Dict, Optional, Tuple, Union
 import config
+from cache import DiskCache, make_key
+
+logger = logging.getLogger(__name__)
+
+
+# GraphQL fields fetched for every repository
+GRAPHQL_REPO_FIELDS = """
+    description
+    stargazerCount
+    forkCount
+    issues(states: OPEN) { totalCount }
+    pullRequests(states: OPEN) { totalCount }
+    licenseInfo { spdxId }
+    createdAt
+    updatedAt
+    pushedAt
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+    homepageUrl
+    defaultBranchRef { name }
+    isArchived
+    diskUsage
+    hasWikiEnabled
+    hasDiscussionsEnabled
+"""
+
+# Additional GraphQL fields fetched only for top projects
+GRAPHQL_DETAIL_FIELDS = """
+    readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: 5) {
+            nodes { oid messageHeadline committedDate author { name } }
+          }
+        }
+      }
+    }
+    languages(first: 20, orderBy: {field: SIZE, direction: DESC}) {
+      edges { size node { name } }
+    }
+"""
+
+# Star/fork counts such as "1,234", "1.2k" or "3M"
+NUMBER_PATTERN = re.compile(r"\s*([\d,.]+)\s*([kKmM]?)")
+NUMBER_SUFFIX_MULTIPLIERS = {"": 1, "k": 1000, "K": 1000, "m": 1000000, "M": 1000000}
+
+# Fetch the README as raw text and only its first 2KB
+README_RAW_HEADERS = {"Accept": "application/vnd.github.raw", "Range": "bytes=0-2047"}
+
+
+def first(nodes: List) -> Optional[lxml_html.HtmlElement]:
+    """Get the first element of an XPath result, or None if it is empty"""
+    return nodes[0] if nodes else None
+
+
+def stripped_text(element: lxml_html.HtmlElement) -> str:
+    """Concatenate the stripped text pieces of an element, like BeautifulSoup's get_text(strip=True)"""
+    return "".join(text.strip() for text in element.itertext())
+
+
+@dataclass(slots=True)
+class TrendingRepo:
+    """Repository as parsed from the trending page, before API enrichment"""
+    owner: str
+    name: str
+    full_name: str
+    url: str
+    description: str
+    language: str
+    stars: int
+    forks: int
+    stars_today: int
+    built_by: List[str]
+
+    def to_dict(self) -> Dict:
+        """Convert to the repository dictionary used by the enrichment and reports, without copying values"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class GitHubRateLimiter:
+    """Paces the requests of one token using the X-RateLimit-* headers of its responses"""
+
+    def __init__(self, reserve: int = config.GITHUB_RATE_LIMIT_RESERVE, safety_factor: float = 1.1):
+        """
+        Initialize the limiter
+        
+        Args:
+            reserve: Remaining request count below which requests are paced
+            safety_factor: Multiplier on the even spacing of the remaining requests
+        """
+        self.reserve = reserve
+        self.safety_factor = safety_factor
+        self.remaining = None
+        self.reset_ts = 0.0
+        # 下一个请求最早可发出的时间，多线程共享，保证整体节奏而非每个线程各自节奏
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until the next request may be sent"""
+        with self._lock:
+            now = time.time()
+            interval = 0.0
+            if self.remaining is not None and self.remaining < self.reserve and self.reset_ts > now:
+                interval = (self.reset_ts - now) / max(1, self.remaining) * self.safety_factor
+                self.remaining = max(0, self.remaining - 1)
+            start = max(now, self._next_at)
+            self._next_at = start + interval
+        if start > now:
+            time.sleep(start - now)
+
+    def update(self, headers):
+        """
+        Record the rate limit state from response headers
+        
+        Args:
+            headers: Response headers of a GitHub API request
+        """
+        retry_after = headers.get("Retry-After")
+        with self._lock:
+            if retry_after:
+                try:
+                    delay = float(retry_after)
+                except ValueError:
+                    delay = 60
+                # 二级限流：所有线程都等到 Retry-After 之后
+                self._next_at = max(self._next_at, time.time() + delay)
+                return
+            
+            # GraphQL 的点数限额与 REST 的 core 限额分开计算
+            if headers.get("X-RateLimit-Resource", "core") != "core":
+                return
+            try:
+                remaining = int(headers["X-RateLimit-Remaining"])
+                reset_ts = float(headers["X-RateLimit-Reset"])
+            except (KeyError, ValueError):
+                return
+            self.remaining = remaining
+            self.reset_ts = reset_ts
+
+
+class GitHubTokenPool:
+    """Round-robin pool of GitHub API tokens that parks tokens until their rate limit resets"""
+
+    def __init__(self, tokens: List[str]):
+        """
+        Initialize the pool
+        
+        Args:
+            tokens: GitHub API tokens, an empty list sends unauthenticated requests
+        """
+        self.size = len(tokens)
+        self._active = deque(tokens)
+        # (reset timestamp, token) of tokens whose primary rate limit is exhausted
+        self._parked = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[str]:
+        """
+        Get the next usable token
+        
+        Returns:
+            A token, or None if the pool is empty
+        """
+        with self._lock:
+            now = time.time()
+            while self._parked and self._parked[0][0] <= now:
+                self._active.append(heapq.heappop(self._parked)[1])
+            if not self._active:
+                if not self._parked:
+                    return None
+                # 全部用尽时取最早恢复的那个，让请求照常失败而不是整体卡住
+                self._active.append(heapq.heappop(self._parked)[1])
+            token = self._active[0]
+            self._active.rotate(-1)
+            return token
+
+    def release(self, token: Optional[str], response: requests.Response) -> bool:
+        """
+        Record the rate limit state reported by a response
+        
+        Args:
+            token: Token the request was sent with
+            response: GitHub API response
+        
+        Returns:
+            Whether the request should be retried (with the next token or after waiting)
+        """
+        if response.status_code not in (403, 429):
+            return False
+        
+        # Secondary rate limit: the token's rate limiter holds the retry back for Retry-After
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            logger.warning("[WARN] GitHub secondary rate limit hit, retrying after %ss", retry_after)
+            return True
+        
+        # Primary rate limit: park the token until its window resets
+        if token and response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset_at = float(response.headers.get("X-RateLimit-Reset", ""))
+            except ValueError:
+                reset_at = time.time() + 60
+            with self._lock:
+                if token in self._active:
+                    self._active.remove(token)
+                    heapq.heappush(self._parked, (reset_at, token))
+                    logger.warning("[WARN] GitHub token exhausted, parked until %s",
+                                   time.strftime("%H:%M:%S", time.localtime(reset_at)))
+                return bool(self._active)
+        return False
 
 
 class TrendingScraper:
     """Scraper for GitHub Trending page"""
 
+    # XPath selectors compiled once and matched in libxml2, no Python callback per element
+    ARTICLE_XPATH = etree.XPath('//article[contains(concat(" ", normalize-space(@class), " "), " Box-row ")]')
+    REPO_LINK_XPATH = etree.XPath('.//h2[contains(concat(" ", normalize-space(@class), " "), " h3 ")]//a')
+    DESCRIPTION_XPATH = etree.XPath('.//p[contains(concat(" ", normalize-space(@class), " "), " col-9 ")]')
+    LANGUAGE_XPATH = etree.XPath('.//span[@itemprop="programmingLanguage"]')
+    STARS_XPATH = etree.XPath('.//a[contains(@href, "/stargazers")]')
+    FORKS_XPATH = etree.XPath('.//a[contains(@href, "/forks")]')
+    STARS_TODAY_XPATH = etree.XPath('.//span[normalize-space(@class)="d-inline-block float-sm-right"]')
+    BUILT_BY_XPATH = etree.XPath('.//a[starts-with(@href, "/") and not(contains(@href, "/commits"))]//img/@alt')
+
     def __init__(self, language: Optional[str] = None, since: str = "daily"):
         """
         Initialize the scraper
@@ -25,11 +257,32 @@ class TrendingScraper:
         """
         self.base_url = config.GITHUB_TRENDING_URL
         self.github_api_url = "https://api.github.com"
+        self.github_graphql_url = f"{self.github_api_url}/graphql"
         self.language = language
         self.since = since
         self.headers = config.REQUEST_HEADERS
-        self.api_headers = config.get_github_api_headers()
+        # 多个 Token 轮流使用，用尽限额的 Token 暂停到重置时间
+        self.tokens = GitHubTokenPool(config.GITHUB_API_TOKENS)
+        # 每个 Token 的限额独立，按响应头主动放缓请求，避免触发限流后再重试
+        self.rate_limiters = {token: GitHubRateLimiter() for token in [None, *config.GITHUB_API_TOKENS]}
         self.timeout = config.REQUEST_TIMEOUT
+        # 复用 keep-alive 连接，避免每个请求重新握手；网页与 API 请求各自传入请求头
+        # 瞬时错误由连接层按 Retry-After 重试；GraphQL 只做查询，POST 也可以安全重试
+        self.session = config.create_http_session(retry_post=True)
+        # REST 响应连同 ETag 落盘，下次用 If-None-Match 复验，304 不计入限流
+        self.cache = DiskCache(config.GITHUB_CACHE_DIR, config.GITHUB_CACHE_TTL)
+
+    def __enter__(self):
+        """Use the scraper as a context manager that closes its session on exit"""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the session when leaving the context"""
+        self.close()
+
+    def close(self):
+        """Close the pooled HTTP connections"""
+        self.session.close()
 
     def _build_url(self) -> str:
         """Build the trending URL with filters"""
@@ -43,94 +296,113 @@ class TrendingScraper:
             url = f"{url}?{'&'.join(params)}"
         return url
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def _fetch_page(self) -> str:
         """Fetch the trending page HTML with retry logic"""
         url = self._build_url()
-        response = requests.get(url, headers=self.headers, timeout=self.timeout)
+        key = make_key("trending_page", url)
+        cached = self.cache.get(key)
+        # 榜单每小时最多更新几次，刚抓过的页面直接复用
+        if cached and time.time() - cached["fetched_at"] < config.TRENDING_CACHE_FRESH:
+            return cached["body"]
+        
+        headers = self.headers
+        if cached:
+            headers = dict(headers)
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached:
+            cached["fetched_at"] = time.time()
+            self.cache.set(key, cached)
+            return cached["body"]
         response.raise_for_status()
+        
+        self.cache.set(key, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body": response.text,
+            "fetched_at": time.time()
+        })
         return response.text
 
-    def _parse_repository(self, article: BeautifulSoup) -> Dict:
-        """Parse a single repository article element"""
-        repo_data = {}
-
+    def _parse_repository(self, article: lxml_html.HtmlElement) -> Optional[TrendingRepo]:
+        """Parse a single repository article element, None if it has no repository link"""
         # Repository name and owner
-        h2 = article.find("h2", class_="h3")
-        if h2:
-            a_tag = h2.find("a")
-            if a_tag:
-                href = a_tag.get("href", "").strip("/")
-                parts = href.split("/")
-                if len(parts) >= 2:
-                    repo_data["owner"] = parts[0]
-                    repo_data["name"] = parts[1]
-                    repo_data["full_name"] = f"{parts[0]}/{parts[1]}"
-                    repo_data["url"] = f"https://github.com/{href}"
+        a_tag = first(self.REPO_LINK_XPATH(article))
+        if a_tag is None:
+            return None
+        href = a_tag.get("href", "").strip("/")
+        parts = href.split("/")
+        if len(parts) < 2:
+            return None
+        owner = parts[0]
 
         # Description
-        p_tag = article.find("p", class_="col-9")
-        if p_tag:
-            repo_data["description"] = p_tag.get_text(strip=True)
-        else:
-            repo_data["description"] = ""
+        p_tag = first(self.DESCRIPTION_XPATH(article))
+        description = stripped_text(p_tag) if p_tag is not None else ""
 
         # Programming language
-        lang_span = article.find("span", itemprop="programmingLanguage")
-        if lang_span:
-            repo_data["language"] = lang_span.get_text(strip=True)
-        else:
-            repo_data["language"] = "Unknown"
+        lang_span = first(self.LANGUAGE_XPATH(article))
+        language = stripped_text(lang_span) if lang_span is not None else "Unknown"
 
         # Stars count
-        stars_link = article.find("a", href=lambda x: x and "/stargazers" in x)
-        if stars_link:
-            stars_text = stars_link.get_text(strip=True).replace(",", "")
-            repo_data["stars"] = self._parse_number(stars_text)
-        else:
-            repo_data["stars"] = 0
+        stars_link = first(self.STARS_XPATH(article))
+        stars = self._parse_number(stripped_text(stars_link).replace(",", "")) if stars_link is not None else 0
 
         # Forks count
-        forks_link = article.find("a", href=lambda x: x and "/forks" in x)
-        if forks_link:
-            forks_text = forks_link.get_text(strip=True).replace(",", "")
-            repo_data["forks"] = self._parse_number(forks_text)
-        else:
-            repo_data["forks"] = 0
+        forks_link = first(self.FORKS_XPATH(article))
+        forks = self._parse_number(stripped_text(forks_link).replace(",", "")) if forks_link is not None else 0
 
         # Today's stars
-        today_stars_span = article.find("span", class_="d-inline-block float-sm-right")
-        if today_stars_span:
-            today_text = today_stars_span.get_text(strip=True)
+        today_stars_span = first(self.STARS_TODAY_XPATH(article))
+        if today_stars_span is not None:
             # Extract number from text like "1,234 stars today"
-            repo_data["stars_today"] = self._parse_number(today_text.split()[0])
+            stars_today = self._parse_number(stripped_text(today_stars_span).split()[0])
         else:
-            repo_data["stars_today"] = 0
+            stars_today = 0
 
         # Built by (contributors)
+        # 按页面顺序去重，输出稳定，便于下游按内容做缓存
         built_by = []
-        built_by_spans = article.find_all("a", href=lambda x: x and x.startswith("/") and "/commits" not in x)
-        for span in built_by_spans:
-            img = span.find("img")
-            if img and img.get("alt"):
-                username = img.get("alt").replace("@", "")
-                if username and username not in ["", repo_data.get("owner", "")]:
-                    built_by.append(username)
-        repo_data["built_by"] = list(set(built_by))[:5]  # Limit to 5 unique contributors
+        seen = set()
+        for alt in self.BUILT_BY_XPATH(article):
+            username = alt.lstrip("@")
+            if username and username != owner and username not in seen:
+                seen.add(username)
+                built_by.append(username)
+                if len(built_by) == 5:  # Limit to 5 unique contributors
+                    break
 
-        return repo_data
+        return TrendingRepo(
+            owner=owner,
+            name=parts[1],
+            full_name=f"{owner}/{parts[1]}",
+            url=f"https://github.com/{href}",
+            description=description,
+            language=language,
+            stars=stars,
+            forks=forks,
+            stars_today=stars_today,
+            built_by=built_by
+        )
 
     def _parse_number(self, text: str) -> int:
         """Parse number from text, handling k/m suffixes"""
-        text = text.lower().replace(",", "").strip()
+        # 绝大多数是纯整数，先走快速路径
         try:
-            if "k" in text:
-                return int(float(text.replace("k", "")) * 1000)
-            elif "m" in text:
-                return int(float(text.replace("m", "")) * 1000000)
-            else:
-                return int(float(text))
-        except (ValueError, AttributeError):
+            return int(text)
+        except (ValueError, TypeError):
+            pass
+        
+        match = NUMBER_PATTERN.match(text) if isinstance(text, str) else None
+        if not match:
+            return 0
+        try:
+            return int(float(match.group(1).replace(",", "")) * NUMBER_SUFFIX_MULTIPLIERS[match.group(2)])
+        except ValueError:
             return 0
 
     def scrape(self, enrich_with_api: bool = True) -> List[Dict]:
@@ -144,70 +416,160 @@ class TrendingScraper:
             List of repository dictionaries
         """
         html = self._fetch_page()
-        soup = BeautifulSoup(html, "lxml")
+        tree = lxml_html.fromstring(html)
         
-        articles = soup.find_all("article", class_="Box-row")
+        articles = self.ARTICLE_XPATH(tree)
         repositories = []
         
         for article in articles:
             try:
-                repo_data = self._parse_repository(article)
-                if repo_data.get("full_name"):
-                    repositories.append(repo_data)
+                repo = self._parse_repository(article)
+                if repo is not None:
+                    repositories.append(repo.to_dict())
             except Exception as e:
-                print(f"Error parsing repository: {e}")
+                logger.exception("Error parsing repository: %s", e)
                 continue
         
         # Enrich with GitHub API data if token is available
-        if enrich_with_api and config.GITHUB_API_TOKEN:
-            print(f"Enriching {len(repositories)} repositories with GitHub API...")
-            repositories = self._enrich_with_api(repositories)
+        if enrich_with_api and config.GITHUB_API_TOKENS:
+            # 只补充今日新增星标最多的 ENRICH_TOP_K 个项目；原地更新，榜单顺序不变
+            top_repos = sorted(repositories, key=operator.itemgetter("stars_today"), reverse=True)
+            top_repos = top_repos[:config.ENRICH_TOP_K]
+            logger.info("Enriching %d repositories with GitHub API...", len(top_repos))
+            self._enrich_with_api(top_repos)
         
         return repositories
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    def _api_request(self, method: str, url: str, headers: Optional[Dict] = None, **kwargs) -> requests.Response:
+        """
+        Send a GitHub API request with the next pooled token
+        
+        Args:
+            method: HTTP method
+            url: API URL
+            headers: Extra headers on top of the API headers
+            **kwargs: Passed through to requests
+        
+        Returns:
+            The last response, after retrying with other tokens on rate limits
+        """
+        for _ in range(self.tokens.size + 1):
+            token = self.tokens.acquire()
+            limiter = self.rate_limiters[token]
+            limiter.acquire()
+            request_headers = config.get_github_api_headers(token or "")
+            if headers:
+                request_headers = {**request_headers, **headers}
+            response = self.session.request(method, url, headers=request_headers, timeout=self.timeout, **kwargs)
+            limiter.update(response.headers)
+            if not self.tokens.release(token, response):
+                break
+        return response
+
+    def _get_cached(self, url: str, ttl: Optional[int] = None, headers: Optional[Dict] = None) -> Tuple[int, Any]:
+        """
+        GET a GitHub REST endpoint, revalidating a cached response with its ETag
+        
+        Args:
+            url: API URL
+            ttl: Cache entry lifetime in seconds, defaults to GITHUB_CACHE_TTL
+            headers: Extra request headers, a raw Accept header returns the body as text
+        
+        Returns:
+            Tuple of status code and decoded body (None unless the status is 200),
+            a 304 Not Modified is reported as 200 with the cached body
+        """
+        raw = bool(headers) and headers.get("Accept") == "application/vnd.github.raw"
+        key = make_key("github_api", url, headers)
+        cached = self.cache.get(key)
+        if cached:
+            headers = {**(headers or {}), "If-None-Match": cached["etag"]}
+        
+        response = self._api_request("GET", url, headers)
+        if response.status_code == 304 and cached:
+            # 复验通过后重新写入，延长有效期，下次运行仍可带 If-None-Match
+            self.cache.set(key, cached, ttl)
+            return 200, cached["body"]
+        # 206 是 Range 请求返回的部分内容
+        if response.status_code not in (200, 206):
+            return response.status_code, None
+        
+        # Range 可能截断多字节字符，丢弃末尾不完整的部分
+        data = response.content.decode("utf-8", errors="ignore") if raw else orjson.loads(response.content)
+        etag = response.headers.get("ETag")
+        if etag:
+            self.cache.set(key, {"etag": etag, "body": data}, ttl)
+        return 200, data
+
+    def scrape_columnar(self, enrich_with_api: bool = True) -> Dict[str, Union[List[str], array]]:
+        """
+        Scrape trending repositories into parallel columns, ranked by today's stars
+        
+        Counts are packed into typed arrays instead of one boxed int per repository dict,
+        which keeps aggregation over many language/period scrapes compact.
+        
+        Args:
+            enrich_with_api: Whether to enrich data using GitHub API
+        
+        Returns:
+            Mapping of column name to values, the same index refers to the same repository
+        """
+        repositories = self.scrape(enrich_with_api=enrich_with_api)
+        stars_today = array("q", (repo.get("stars_today", 0) for repo in repositories))
+        order = sorted(range(len(repositories)), key=stars_today.__getitem__, reverse=True)
+        ranked = [repositories[i] for i in order]
+        
+        columns = {
+            column: [repo.get(column, "") for repo in ranked]
+            for column in ("full_name", "description", "language")
+        }
+        for column in ("stars", "forks", "stars_today"):
+            columns[column] = array("q", (repo.get(column, 0) for repo in ranked))
+        return columns
+
     def _fetch_repo_api(self, full_name: str) -> Optional[Dict]:
         """Fetch repository details from GitHub API"""
         try:
             url = f"{self.github_api_url}/repos/{full_name}"
-            response = requests.get(url, headers=self.api_headers, timeout=self.timeout)
+            status_code, data = self._get_cached(url)
             
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 403:
-                print(f"GitHub API rate limit exceeded for {full_name}")
+            if status_code == 200:
+                return data
+            elif status_code == 403:
+                logger.warning("GitHub API rate limit exceeded for %s", full_name)
                 return None
             else:
                 return None
         except Exception as e:
-            print(f"Error fetching API data for {full_name}: {e}")
+            logger.warning("Error fetching API data for %s: %s", full_name, e)
             return None
 
     def _fetch_readme(self, full_name: str) -> Optional[str]:
-        """Fetch repository README content"""
+        """Fetch repository README content, an empty string if there is none and None if the request failed"""
         try:
             url = f"{self.github_api_url}/repos/{full_name}/readme"
-            response = requests.get(url, headers=self.api_headers, timeout=self.timeout)
+            # 直接取原文而不是 base64 编码的 JSON，并且只下载开头 2KB
+            status_code, content = self._get_cached(
+                url, config.GITHUB_CACHE_TTL_LONG, README_RAW_HEADERS
+            )
             
-            if response.status_code == 200:
-                import base64
-                data = response.json()
-                content = base64.b64decode(data.get("content", "")).decode("utf-8")
+            if status_code == 200:
                 # 截取前 2000 字符，避免太长
-                return content[:2000] if len(content) > 2000 else content
+                return content[:2000]
+            if status_code == 404:
+                return ""
             return None
         except Exception as e:
-            print(f"Error fetching README for {full_name}: {e}")
+            logger.warning("Error fetching README for %s: %s", full_name, e)
             return None
 
-    def _fetch_recent_commits(self, full_name: str, count: int = 5) -> List[Dict]:
-        """Fetch recent commits"""
+    def _fetch_recent_commits(self, full_name: str, count: int = 5) -> Optional[List[Dict]]:
+        """Fetch recent commits, None if the request failed"""
         try:
             url = f"{self.github_api_url}/repos/{full_name}/commits?per_page={count}"
-            response = requests.get(url, headers=self.api_headers, timeout=self.timeout)
+            status_code, commits = self._get_cached(url)
             
-            if response.status_code == 200:
-                commits = response.json()
+            if status_code == 200:
                 return [
                     {
                         "sha": c.get("sha", "")[:7],
@@ -217,90 +579,304 @@ class TrendingScraper:
                     }
                     for c in commits
                 ]
-            return []
+            # 409 表示仓库还没有任何提交
+            if status_code == 409:
+                return []
+            return None
         except Exception as e:
-            print(f"Error fetching commits for {full_name}: {e}")
-            return []
+            logger.warning("Error fetching commits for %s: %s", full_name, e)
+            return None
 
-    def _fetch_languages(self, full_name: str) -> Dict[str, int]:
-        """Fetch repository languages breakdown"""
+    def _fetch_languages(self, full_name: str) -> Optional[Dict[str, int]]:
+        """Fetch repository languages breakdown, None if the request failed"""
         try:
             url = f"{self.github_api_url}/repos/{full_name}/languages"
-            response = requests.get(url, headers=self.api_headers, timeout=self.timeout)
+            status_code, data = self._get_cached(url, config.GITHUB_CACHE_TTL_LONG)
             
-            if response.status_code == 200:
-                return response.json()
-            return {}
+            if status_code == 200:
+                return data
+            return None
         except Exception as e:
-            print(f"Error fetching languages for {full_name}: {e}")
-            return {}
+            logger.warning("Error fetching languages for %s: %s", full_name, e)
+            return None
 
-    def _enrich_with_api(self, repositories: List[Dict], fetch_details: bool = True) -> List[Dict]:
+    def _build_graphql_query(self, full_names: List[str], detail_count: int) -> str:
+        """Build one aliased GraphQL query covering all given repositories"""
+        fragments = []
+        for i, full_name in enumerate(full_names):
+            owner, name = full_name.split("/", 1)
+            fields = GRAPHQL_REPO_FIELDS
+            if i < detail_count:
+                fields += GRAPHQL_DETAIL_FIELDS
+            fragments.append(
+                f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{{fields}}}"
+            )
+        return "query {\n" + "\n".join(fragments) + "\n}"
+
+    def _fetch_graphql_batch(self, full_names: List[str], detail_count: int = 10) -> Optional[Dict[str, Dict]]:
         """
-        Enrich repository data with GitHub API information
+        Fetch metadata for many repositories with a single GraphQL request
+        
+        Args:
+            full_names: Repository full names ('owner/name')
+            detail_count: Number of leading repositories that also get README, commits and languages
+        
+        Returns:
+            Mapping of full name to repository data in REST-like shape, or None if the request failed
+        """
+        try:
+            query = self._build_graphql_query(full_names, detail_count)
+            response = self._api_request("POST", self.github_graphql_url, json={"query": query})
+            if response.status_code != 200:
+                logger.warning("GitHub GraphQL request failed with status %d", response.status_code)
+                return None
+            
+            payload = orjson.loads(response.content)
+            data = payload.get("data") or {}
+            if not data and payload.get("errors"):
+                logger.warning("GitHub GraphQL errors: %s", payload["errors"][0].get("message"))
+                return None
+        except Exception as e:
+            logger.warning("Error fetching GraphQL data: %s", e)
+            return None
+        
+        results = {}
+        for i, full_name in enumerate(full_names):
+            node = data.get(f"r{i}")
+            if node:
+                results[full_name] = self._convert_graphql_repo(node)
+        return results
+
+    def _convert_graphql_repo(self, node: Dict) -> Dict:
+        """Convert a GraphQL repository node into the enrichment fields used by the reports"""
+        default_branch = node.get("defaultBranchRef") or {}
+        converted = {
+            "description": node.get("description"),
+            "stars": node.get("stargazerCount", 0),
+            "forks": node.get("forkCount", 0),
+            # REST watchers_count mirrors the stargazer count
+            "watchers": node.get("stargazerCount", 0),
+            "open_issues": (node.get("issues") or {}).get("totalCount", 0)
+                           + (node.get("pullRequests") or {}).get("totalCount", 0),
+            "license": (node.get("licenseInfo") or {}).get("spdxId"),
+            "created_at": node.get("createdAt"),
+            "updated_at": node.get("updatedAt"),
+            "pushed_at": node.get("pushedAt"),
+            "topics": [n["topic"]["name"] for n in (node.get("repositoryTopics") or {}).get("nodes", [])],
+            "homepage": node.get("homepageUrl"),
+            "default_branch": default_branch.get("name"),
+            "archived": node.get("isArchived", False),
+            "size": node.get("diskUsage") or 0,  # KB
+            "has_wiki": node.get("hasWikiEnabled", False),
+            "has_discussions": node.get("hasDiscussionsEnabled", False),
+        }
+        
+        readme = (node.get("readme") or {}).get("text")
+        if readme:
+            # 截取前 2000 字符，避免太长
+            converted["readme_excerpt"] = readme[:2000]
+        
+        history = ((default_branch.get("target") or {}).get("history") or {}).get("nodes")
+        if history:
+            converted["recent_commits"] = [
+                {
+                    "sha": c.get("oid", "")[:7],
+                    "message": (c.get("messageHeadline") or "")[:100],
+                    "date": c.get("committedDate"),
+                    "author": (c.get("author") or {}).get("name")
+                }
+                for c in history
+            ]
+        
+        languages = node.get("languages")
+        if languages:
+            converted["languages"] = {e["node"]["name"]: e["size"] for e in languages.get("edges", [])}
+        
+        return converted
+
+    def _enrich_with_graphql(self, repositories: List[Dict], fetch_details: bool = True) -> Optional[List[Dict]]:
+        """
+        Enrich repository data with one batched GraphQL query
         
         Args:
             repositories: List of repository dictionaries from scraping
-            fetch_details: Whether to fetch README, commits, languages (more API calls)
+            fetch_details: Whether to fetch README, commits, languages for top projects
         
         Returns:
-            Enriched list of repository dictionaries
+            Enriched list of repository dictionaries, or None if the GraphQL request failed
         """
-        enriched = []
+        full_names = [repo["full_name"] for repo in repositories if repo.get("full_name")]
+        if not full_names:
+            return repositories
+        
+        # 每次查询最多 GITHUB_GRAPHQL_BATCH_SIZE 个项目，控制单次查询的复杂度
+        detail_total = 10 if fetch_details else 0
+        batch_size = config.GITHUB_GRAPHQL_BATCH_SIZE
+        batch = {}
+        for start in range(0, len(full_names), batch_size):
+            try:
+                result = self._fetch_graphql_batch(
+                    full_names[start:start + batch_size], detail_count=max(0, detail_total - start)
+                )
+            except Exception as e:
+                logger.warning("Error fetching GraphQL data: %s", e)
+                return None
+            if result is None:
+                return None
+            batch.update(result)
         
+        missing_readme = []
+        missing_repos = []
         for i, repo in enumerate(repositories):
-            full_name = repo.get("full_name")
-            if not full_name:
-                enriched.append(repo)
+            api_data = batch.get(repo.get("full_name"))
+            if not api_data:
+                # GraphQL 查不到的项目（如已改名）单独用 REST 接口补充
+                if repo.get("full_name"):
+                    missing_repos.append((i, repo))
                 continue
             
-            print(f"  [{i+1}/{len(repositories)}] Enriching {full_name}...")
-            
-            api_data = self._fetch_repo_api(full_name)
+            description = api_data.pop("description")
+            repo.update(api_data)
+            # Use API description if scraped one is empty
+            if not repo.get("description") and description:
+                repo["description"] = description
             
-            if api_data:
-                # Basic API data
-                repo["stars"] = api_data.get("stargazers_count", repo.get("stars", 0))
-                repo["forks"] = api_data.get("forks_count", repo.get("forks", 0))
-                repo["watchers"] = api_data.get("watchers_count", 0)
-                repo["open_issues"] = api_data.get("open_issues_count", 0)
-                repo["license"] = api_data.get("license", {}).get("spdx_id") if api_data.get("license") else None
-                repo["created_at"] = api_data.get("created_at")
-                repo["updated_at"] = api_data.get("updated_at")
-                repo["pushed_at"] = api_data.get("pushed_at")
-                repo["topics"] = api_data.get("topics", [])
-                repo["homepage"] = api_data.get("homepage")
-                repo["default_branch"] = api_data.get("default_branch")
-                repo["archived"] = api_data.get("archived", False)
-                repo["size"] = api_data.get("size", 0)  # KB
-                repo["has_wiki"] = api_data.get("has_wiki", False)
-                repo["has_pages"] = api_data.get("has_pages", False)
-                repo["has_discussions"] = api_data.get("has_discussions", False)
-                
-                # Use API description if scraped one is empty
-                if not repo.get("description") and api_data.get("description"):
-                    repo["description"] = api_data.get("description")
-                
-                # Fetch additional details for top projects (limit API calls)
-                if fetch_details and i < 10:  # Only top 10 projects
-                    # README
-                    readme = self._fetch_readme(full_name)
+            if fetch_details and i < 10 and "readme_excerpt" not in repo:
+                missing_readme.append(repo)
+        
+        # README 不一定叫 README.md，缺失时用 REST 接口并发兜底
+        if missing_readme or missing_repos:
+            with ThreadPoolExecutor(max_workers=config.GITHUB_API_CONCURRENCY) as executor:
+                rest_futures = [
+                    executor.submit(self._enrich_repo_rest, i, repo, len(repositories), fetch_details)
+                    for i, repo in missing_repos
+                ]
+                readmes = executor.map(self._fetch_readme, [repo["full_name"] for repo in missing_readme])
+                for repo, readme in zip(missing_readme, readmes):
                     if readme:
                         repo["readme_excerpt"] = readme
-                    
-                    # Recent commits
-                    commits = self._fetch_recent_commits(full_name, 5)
-                    if commits:
-                        repo["recent_commits"] = commits
-                    
-                    # Languages breakdown
-                    languages = self._fetch_languages(full_name)
-                    if languages:
-                        repo["languages"] = languages
+                for future in rest_futures:
+                    future.result()
+        
+        return repositories
+
+    def _enrich_with_api(self, repositories: List[Dict], fetch_details: bool = True) -> List[Dict]:
+        """
+        Enrich repository data with GitHub API information
+        
+        Args:
+            repositories: List of repository dictionaries from scraping
+            fetch_details: Whether to fetch README, commits, languages (more API calls)
+        
+        Returns:
+            Enriched list of repository dictionaries
+        """
+        # 优先用一次 GraphQL 请求获取全部项目信息，失败时退回逐个 REST 请求
+        enriched = self._enrich_with_graphql(repositories, fetch_details)
+        if enriched is not None:
+            return enriched
+        
+        logger.info("  GraphQL enrichment failed, falling back to REST API...")
+        # 各项目的 REST 请求相互独立，并发请求；并发数不超过 GitHub 二级限流建议的 10
+        with ThreadPoolExecutor(max_workers=config.GITHUB_API_CONCURRENCY) as executor:
+            return list(executor.map(
+                lambda args: self._enrich_repo_rest(*args, len(repositories), fetch_details),
+                enumerate(repositories)
+            ))
+
+    def _enrich_repo_rest(self, i: int, repo: Dict, total: int, fetch_details: bool) -> Dict:
+        """
+        Enrich one repository with the GitHub REST API
+        
+        Args:
+            i: Index of the repository in the trending list
+            repo: Repository dictionary from scraping, updated in place
+            total: Number of repositories being enriched
+            fetch_details: Whether to fetch README, commits, languages for top projects
+        
+        Returns:
+            The enriched repository dictionary
+        """
+        full_name = repo.get("full_name")
+        if not full_name:
+            return repo
+        
+        logger.info("  [%d/%d] Enriching %s...", i + 1, total, full_name)
+        
+        api_data = self._fetch_repo_api(full_name)
+        
+        if api_data:
+            # Basic API data
+            repo["stars"] = api_data.get("stargazers_count", repo.get("stars", 0))
+            repo["forks"] = api_data.get("forks_count", repo.get("forks", 0))
+            repo["watchers"] = api_data.get("watchers_count", 0)
+            repo["open_issues"] = api_data.get("open_issues_count", 0)
+            repo["license"] = api_data.get("license", {}).get("spdx_id") if api_data.get("license") else None
+            repo["created_at"] = api_data.get("created_at")
+            repo["updated_at"] = api_data.get("updated_at")
+            repo["pushed_at"] = api_data.get("pushed_at")
+            repo["topics"] = api_data.get("topics", [])
+            repo["homepage"] = api_data.get("homepage")
+            repo["default_branch"] = api_data.get("default_branch")
+            repo["archived"] = api_data.get("archived", False)
+            repo["size"] = api_data.get("size", 0)  # KB
+            repo["has_wiki"] = api_data.get("has_wiki", False)
+            repo["has_pages"] = api_data.get("has_pages", False)
+            repo["has_discussions"] = api_data.get("has_discussions", False)
             
-            enriched.append(repo)
+            # Use API description if scraped one is empty
+            if not repo.get("description") and api_data.get("description"):
+                repo["description"] = api_data.get("description")
+            
+            # Fetch additional details for top projects (limit API calls)
+            if fetch_details and i < 10:  # Only top 10 projects
+                self._fetch_details(repo)
+        
+        return repo
+
+    def _fetch_details(self, repo: Dict):
+        """
+        Fetch README, recent commits and languages of a top project
+        
+        The details only change with a push, so they are reused from the previous run
+        while the repository's pushed_at is unchanged.
+        
+        Args:
+            repo: Enriched repository dictionary, updated in place
+        """
+        full_name = repo["full_name"]
+        key = make_key("repo_details", full_name)
+        cached = self.cache.get(key)
+        if cached and repo.get("pushed_at") and cached["pushed_at"] == repo["pushed_at"]:
+            repo.update(cached["details"])
+            return
+        
+        # 三个接口互不依赖，并发请求，耗时取决于最慢的一个
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            readme_future = executor.submit(self._fetch_readme, full_name)
+            commits_future = executor.submit(self._fetch_recent_commits, full_name, 5)
+            languages_future = executor.submit(self._fetch_languages, full_name)
+        
+        details = {}
+        # README
+        readme = readme_future.result()
+        if readme:
+            details["readme_excerpt"] = readme
+        
+        # Recent commits
+        commits = commits_future.result()
+        if commits:
+            details["recent_commits"] = commits
+        
+        # Languages breakdown
+        languages = languages_future.result()
+        if languages:
+            details["languages"] = languages
         
-        return enriched
+        repo.update(details)
+        # 任一请求失败（如被限流）时不缓存，否则空结果会在 pushed_at 不变期间一直被复用
+        if repo.get("pushed_at") and None not in (readme, commits, languages):
+            self.cache.set(key, {"pushed_at": repo["pushed_at"], "details": details}, config.GITHUB_CACHE_TTL_LONG)
 
 
 def fetch_trending(language: Optional[str] = None, since: str = "daily") -> List[Dict]:
@@ -314,11 +890,12 @@ def fetch_trending(language: Optional[str] = None, since: str = "daily") -> List
     Returns:
         List of trending repository dictionaries
     """
-    scraper = TrendingScraper(language=language, since=since)
-    return scraper.scrape()
+    with TrendingScraper(language=language, since=since) as scraper:
+        return scraper.scrape()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # Test the scraper
     repos = fetch_trending()
     print(f"Found {len(repos)} trending repositories")